@@ -0,0 +1,340 @@
+#!usr/bin/env python
+
+# External libraries
+from collections import OrderedDict
+from typing import Iterable, Mapping, Set, Tuple
+from pyutils.multimap import Batch, MultiMap, NeighboursView, Node, Relation, State, Totals
+
+
+class BoundedMultiMap(MultiMap):
+    """
+    Capacity bounded ``MultiMap`` for caching the relationships of source
+    nodes fetched from a slower backing store. Whenever the map outgrows
+    its capacity, whole source nodes are evicted along with all their
+    relationships in either direction by least recently or least
+    frequently used order.
+
+    Inserting relationships of a new source node admits it to the cache
+    while forward reads count as hits or misses & refresh the recency or
+    frequency of existing source nodes. Forward reads are ``source()``
+    (or indexing & calling), ``source_many()``, ``targets_with_*()``,
+    ``count()`` & ``in``, each accounting for every source node looked
+    up, along with ``sources_with_*()`` counting a hit for every source
+    node matched. Backward reads, degrees, iteration & any read through
+    an inverse view leave the cache untouched. Each access, admission &
+    eviction costs constant amortized time.
+    """
+
+    def __init__(self, items: Iterable[Relation] = None, capacity: int = 1024, unit: str = "sources", policy: str = "lru"):
+        """
+        Constructor to instantiate a new ``BoundedMultiMap``.
+
+        Args:
+            items: Optional collection of source & destination nodes to map.
+            capacity: Maximum number of source nodes or relationships to keep.
+            unit: To bound the number of distinct ``"sources"`` nodes or the
+                number of ``"relations"`` including duplicates.
+            policy: To evict the least recently used (``"lru"``) or least
+                frequently used (``"lfu"``) source nodes first.
+        """
+        if capacity < 1:
+            raise ValueError(f"Invalid capacity: {capacity}")
+        if unit not in _UNITS:
+            raise ValueError(f"Invalid unit: {unit}")
+        if policy not in _POLICIES:
+            raise ValueError(f"Invalid policy: {policy}")
+        self.capacity = capacity
+        self.unit = unit
+        self.policy = policy
+        self.hits = 0           # forward lookups of cached source nodes
+        self.misses = 0         # forward lookups of uncached source nodes
+        self.evictions = 0      # source nodes evicted to honour capacity
+        self._usage = _POLICIES[policy]()
+        self._deferred = False  # whether evictions wait for the end of a bulk insert
+        super().__init__(items)
+        return
+
+    def source(self, src: Node) -> NeighboursView:
+        """
+        Forward maps from a specific source node as per ``MultiMap.source()``
+        while recording a cache hit or miss.
+        """
+        self._access((src,))
+        return super().source(src)
+
+    def source_many(self, srcs: Iterable[Node], how: str = "dict") -> Batch:
+        """
+        Forward maps from many source nodes at once as per
+        ``MultiMap.source_many()`` while recording a cache hit or miss
+        for each of them.
+        """
+        srcs = list(srcs)
+        self._access(srcs)
+        return super().source_many(srcs, how)
+
+    def sources_with_all(self, dsts: Iterable[Node]) -> Set[Node]:
+        """
+        Retrieves the source nodes related to every one of many target nodes
+        as per ``MultiMap.sources_with_all()`` while recording a cache hit
+        for each of them.
+        """
+        srcs = super().sources_with_all(dsts)
+        self._access(srcs)
+        return srcs
+
+    def sources_with_any(self, dsts: Iterable[Node]) -> Set[Node]:
+        """
+        Retrieves the source nodes related to at least one of many target
+        nodes as per ``MultiMap.sources_with_any()`` while recording a
+        cache hit for each of them.
+        """
+        srcs = super().sources_with_any(dsts)
+        self._access(srcs)
+        return srcs
+
+    def sources_with_at_least(self, dsts: Iterable[Node], k: int) -> Set[Node]:
+        """
+        Retrieves the source nodes related to at least ``k`` of many target
+        nodes as per ``MultiMap.sources_with_at_least()`` while recording
+        a cache hit for each of them.
+        """
+        srcs = super().sources_with_at_least(dsts, k)
+        self._access(srcs)
+        return srcs
+
+    def targets_with_all(self, srcs: Iterable[Node]) -> Set[Node]:
+        """
+        Retrieves the target nodes related to every one of many source nodes
+        as per ``MultiMap.targets_with_all()`` while recording a cache hit
+        or miss for each distinct source.
+        """
+        srcs = set(srcs)
+        self._access(srcs)
+        return super().targets_with_all(srcs)
+
+    def targets_with_any(self, srcs: Iterable[Node]) -> Set[Node]:
+        """
+        Retrieves the target nodes related to at least one of many source
+        nodes as per ``MultiMap.targets_with_any()`` while recording a
+        cache hit or miss for each distinct source.
+        """
+        srcs = set(srcs)
+        self._access(srcs)
+        return super().targets_with_any(srcs)
+
+    def targets_with_at_least(self, srcs: Iterable[Node], k: int) -> Set[Node]:
+        """
+        Retrieves the target nodes related to at least ``k`` of many source
+        nodes as per ``MultiMap.targets_with_at_least()`` while recording
+        a cache hit or miss for each distinct source.
+        """
+        srcs = set(srcs)
+        self._access(srcs)
+        return super().targets_with_at_least(srcs, k)
+
+    def count(self, src: Node, dst: Node) -> int:
+        """
+        Number of identical relationships from a source to a destination
+        node as per ``MultiMap.count()`` while recording a cache hit or
+        miss unless the source is ``MultiMap.UNDEFINED``. Membership tests
+        count the same way.
+        """
+        if src != MultiMap.UNDEFINED:
+            self._access((src,))
+        return super().count(src, dst)
+
+    def inverse(self, copy: bool = True, view: bool = False) -> MultiMap:
+        """
+        Reverses source & destination direction mapping of all relationships
+        as per ``MultiMap.inverse()``. Reversing in place re-admits the new
+        source nodes in no particular order & evicts any excess.
+        """
+        result = super().inverse(copy, view)
+        if result is self:
+            self._track()
+        return result
+
+    def clear(self) -> 'BoundedMultiMap':
+        """
+        Inplace deletes all relationships in this map. Cache statistics are kept.
+
+        Returns:
+            result: Modified instance of this map.
+        """
+        super().clear()
+        self._usage.clear()
+        return self
+
+    def copy(self) -> 'BoundedMultiMap':
+        """
+        Creates a new but shallow clone of this mapping & its cache usage
+        as per ``MultiMap.copy()``.
+        """
+        clone = super().copy()
+        clone._usage = self._usage.copy()
+        return clone
+
+    # compactly serialize the configuration & forward frequencies of this map.
+    def __getstate__(self) -> Tuple[Tuple[int, str, str], State]:
+        return (self.capacity, self.unit, self.policy), super().__getstate__()
+
+    # rebuild this map from its configuration & forward frequencies.
+    def __setstate__(self, state: Tuple[Tuple[int, str, str], State]) -> None:
+        config, state = state
+        self.__init__(None, *config)
+        self._restore(state)
+        return
+
+    __getitem__ = source    # syntactic sugar idexable like list
+    __call__ = source       # syntactic sugar callable like function
+
+    # record a hit refreshing the usage of each cached source node read
+    # forward & a miss for each uncached one.
+    def _access(self, srcs: Iterable[Node]) -> None:
+        for src in srcs:
+            if src in self._sources:
+                self.hits += 1
+                self._usage.touch(src)
+            else:
+                self.misses += 1
+
+    # admit new source nodes before evicting any excess.
+    def _link(self, src: Node, dst: Node, n: int = 1) -> None:
+        super()._link(src, dst, n)
+        self._usage.admit(src)
+        if not self._deferred:
+            self._evict()
+
+    # bulk insert a snapshot of relationships, possibly of this very map,
+    # before evicting any excess at once.
+    def _merge(self, grouped: Iterable[Tuple[Node, Mapping[Node, int]]]) -> 'BoundedMultiMap':
+        grouped = [(src, dict(freqs)) for src, freqs in grouped]
+        self._deferred = True
+        try:
+            super()._merge(grouped)
+        finally:
+            self._deferred = False
+            self._evict()
+        return self
+
+    # forget source nodes once they have no more relationships.
+    def _unlink(self, src: Node, dst: Node, n: int = 1) -> int:
+        n = super()._unlink(src, dst, n)
+        if src not in self._sources:
+            self._usage.discard(src)
+        return n
+
+    # bulk rebuilt maps admit all their source nodes at once.
+    def _mirror(self, totals: Totals = None) -> 'BoundedMultiMap':
+        super()._mirror(totals)
+        self._track()
+        return self
+
+    # re-admit all source nodes & evict any excess.
+    def _track(self) -> None:
+        self._usage.clear()
+        for src in self._sources:
+            self._usage.admit(src)
+        self._evict()
+
+    # remove whole source nodes in policy order until within capacity.
+    def _evict(self) -> None:
+        while (len(self._sources) if self.unit == "sources" else self._size) > self.capacity:
+            src = self._usage.pop()
+            MultiMap.__delitem__(self, (src, MultiMap.UNDEFINED))
+            self.evictions += 1
+
+
+class _LRUPolicy:
+    """
+    Least recently used order of cached keys.
+    """
+
+    def __init__(self):
+        self._keys = OrderedDict()      # keys from least to most recently used
+
+    def admit(self, key: Node) -> None:
+        if key not in self._keys:
+            self._keys[key] = None
+
+    def touch(self, key: Node) -> None:
+        self._keys.move_to_end(key)
+
+    def discard(self, key: Node) -> None:
+        self._keys.pop(key, None)
+
+    def pop(self) -> Node:
+        return self._keys.popitem(last=False)[0]
+
+    def clear(self) -> None:
+        self._keys.clear()
+
+    def copy(self) -> '_LRUPolicy':
+        clone = _LRUPolicy()
+        clone._keys = self._keys.copy()
+        return clone
+
+
+class _LFUPolicy:
+    """
+    Least frequently used order of cached keys with ties broken by least
+    recent use.
+    """
+
+    def __init__(self):
+        self._uses = dict()     # number of uses of each key
+        self._buckets = dict()  # keys from least to most recently used by number of uses
+        self._least = 0         # lower bound on the fewest uses of any key
+
+    def admit(self, key: Node) -> None:
+        if key not in self._uses:
+            self._uses[key] = 1
+            self._buckets.setdefault(1, OrderedDict())[key] = None
+            self._least = 1
+
+    def touch(self, key: Node) -> None:
+        uses = self._uses[key]
+        self._forget(key, uses)
+        if self._least == uses and uses not in self._buckets:
+            self._least = uses + 1
+        self._uses[key] = uses + 1
+        self._buckets.setdefault(uses + 1, OrderedDict())[key] = None
+
+    def discard(self, key: Node) -> None:
+        uses = self._uses.pop(key, None)
+        if uses is not None:
+            self._forget(key, uses)
+
+    def pop(self) -> Node:
+        if self._least not in self._buckets:
+            self._least = min(self._buckets)    # only after discarding keys
+        key = next(iter(self._buckets[self._least]))
+        self._forget(key, self._least)
+        del self._uses[key]
+        return key
+
+    def clear(self) -> None:
+        self._uses.clear()
+        self._buckets.clear()
+        self._least = 0
+
+    def copy(self) -> '_LFUPolicy':
+        clone = _LFUPolicy()
+        clone._uses = self._uses.copy()
+        clone._buckets = {uses: keys.copy() for uses, keys in self._buckets.items()}
+        clone._least = self._least
+        return clone
+
+    # remove a key from the bucket of its number of uses.
+    def _forget(self, key: Node, uses: int) -> None:
+        bucket = self._buckets[uses]
+        del bucket[key]
+        if not bucket:
+            del self._buckets[uses]
+
+
+# Eviction policies by name.
+_POLICIES = {"lru": _LRUPolicy, "lfu": _LFUPolicy}
+
+# Measures of capacity.
+_UNITS = {"sources", "relations"}
@@ -0,0 +1,304 @@
+#!usr/bin/env python
+
+# External libraries
+from collections import Counter
+from contextlib import nullcontext
+from itertools import chain, repeat, starmap
+from typing import ContextManager, Iterable, List, Set, Tuple
+from pyutils.multimap import MultiMap, Node, Relation
+import threading
+
+
+class ConcurrentMultiMap:
+    """
+    Thread safe counterpart of ``MultiMap`` for many concurrent readers &
+    writers. Source & target nodes are partitioned by their hash into
+    lock striped shards. Writers only lock the shards of the nodes they
+    modify, so both directions of a relationship are updated atomically
+    with respect to other writers while unrelated writers never wait on
+    each other's locks. Under CPython's global interpreter lock, threads
+    still run one at a time though, so striping only reduces contention
+    rather than letting writers proceed in parallel.
+
+    Readers never take locks. Instead, they atomically snapshot the
+    frequencies they need, so lookups return point in time copies
+    rather than live views & may momentarily observe a relationship
+    that is being written in only one of its directions.
+    """
+
+    def __init__(self, items: Iterable[Relation] = None, shards: int = 16):
+        """
+        Constructor to instantiate a new ``ConcurrentMultiMap``.
+
+        Args:
+            items: Optional collection of source & destination nodes to map.
+            shards: Number of lock striped partitions of the nodes.
+        """
+        if shards < 1:
+            raise ValueError(f"Invalid number of shards: {shards}")
+        self._locks = [threading.Lock() for _ in range(shards)]
+        self._sources = [dict() for _ in range(shards)]   # outgoing frequencies by source shard
+        self._targets = [dict() for _ in range(shards)]   # incoming frequencies by target shard
+        self._sizes = [0] * shards                        # relations by source shard
+        self._pairs = [0] * shards                        # distinct relations by source shard
+        self.update(items or [])
+        return
+
+    @property
+    def domain(self) -> Set[Node]:
+        """
+        Snapshots the set of distinct source nodes of this map.
+        """
+        return {src for shard in self._sources for src in shard.copy()}
+
+    @property
+    def range(self) -> Set[Node]:
+        """
+        Snapshots the set of distinct target nodes of this map.
+        """
+        return {dst for shard in self._targets for dst in shard.copy()}
+
+    def items(self) -> Iterable[Relation]:
+        """
+        Retrieves the source & destination relations in this map by
+        snapshotting the relations of one source at a time.
+        """
+        return (
+            (src, dst)
+            for shard in self._sources
+            for src, freqs in shard.copy().items()
+            for dst, freq in dict(freqs).items()
+            for _ in range(freq)
+        )
+
+    def source(self, src: Node) -> List[Node]:
+        """
+        Forward maps from a specific source node & snapshots its (possibly
+        duplicated) related target nodes if any or empty otherwise.
+        """
+        return self._snapshot(self._sources, src)
+
+    def target(self, dst: Node) -> List[Node]:
+        """
+        Backwards maps from a specific target node & snapshots its (possibly
+        duplicated) related source nodes if any or empty otherwise.
+        """
+        return self._snapshot(self._targets, dst)
+
+    def size(self, distinct: bool = False) -> int:
+        """
+        Number of relationships in this map.
+
+        Args:
+            distinct: To only count unique source & destination pairs
+                rather than every duplicated relationship.
+        """
+        return sum(self._pairs if distinct else self._sizes)
+
+    def add(self, src: Node, dst: Node) -> 'ConcurrentMultiMap':
+        """
+        Inplace & atomically inserts a specific relationship to this map
+        even if an identical one already exists.
+
+        Args:
+            src: Source node
+            dst: Destination node
+
+        Returns:
+            result: Modified instance of this map.
+        """
+        if src != MultiMap.UNDEFINED and dst != MultiMap.UNDEFINED:
+            i, j = self._shard(src), self._shard(dst)
+            first, second = self._locks_of(i, j)
+            with first, second:
+                self._link(i, j, src, dst, 1)
+        return self
+
+    def update(self, items: Iterable[Relation]) -> 'ConcurrentMultiMap':
+        """
+        Inplace inserts a collection of relationships to this map in bulk.
+        Duplicate relationships are first tallied together so that each
+        distinct relationship is only locked & indexed once.
+
+        Args:
+            items: Collection of source & destination nodes to map.
+
+        Returns:
+            result: Modified instance of this map.
+        """
+        for (src, dst), freq in Counter(items).items():
+            if src != MultiMap.UNDEFINED and dst != MultiMap.UNDEFINED:
+                i, j = self._shard(src), self._shard(dst)
+                first, second = self._locks_of(i, j)
+                with first, second:
+                    self._link(i, j, src, dst, freq)
+        return self
+
+    def remove(self, src: Node, dst: Node) -> 'ConcurrentMultiMap':
+        """
+        Inplace & atomically deletes specific relationships from this map.
+        When multiple identical relationships exists, only 1 is removed.
+        No effect if the relationship does not exists.
+
+        Args:
+            src: Source node. Removes all mappings from a destination when it is ``MultiMap.UNDEFINED``
+            dst: Destination node. Removes all mappings from a source when it is ``MultiMap.UNDEFINED``
+
+        Returns:
+            result: Modified instance of this map.
+        """
+        return self.__delitem__((src, dst))
+
+    def remove_many(self, items: Iterable[Relation]) -> 'ConcurrentMultiMap':
+        """
+        Inplace deletes a collection of relationships from this map in bulk.
+        Each occurrence of a relationship removes 1 identical relationship
+        from this map. No effect for relationships that do not exist.
+
+        Args:
+            items: Collection of source & destination nodes to unmap.
+
+        Returns:
+            result: Modified instance of this map.
+        """
+        for (src, dst), freq in Counter(items).items():
+            if src == MultiMap.UNDEFINED or dst == MultiMap.UNDEFINED:
+                self.__delitem__((src, dst))
+                continue
+            i, j = self._shard(src), self._shard(dst)
+            first, second = self._locks_of(i, j)
+            with first, second:
+                self._unlink(i, j, src, dst, freq)
+        return self
+
+    def clear(self) -> 'ConcurrentMultiMap':
+        """
+        Inplace & atomically deletes all relationships in this map.
+
+        Returns:
+            result: Modified instance of this map.
+        """
+        self._acquire_all()
+        try:
+            for i in range(len(self._locks)):
+                self._sources[i].clear()
+                self._targets[i].clear()
+                self._sizes[i] = self._pairs[i] = 0
+        finally:
+            self._release_all()
+        return self
+
+    def copy(self) -> 'ConcurrentMultiMap':
+        """
+        Creates a new but shallow clone of this mapping.
+        """
+        return ConcurrentMultiMap(self.to_multimap(), shards=len(self._locks))
+
+    def to_multimap(self) -> MultiMap:
+        """
+        Snapshots this map as a new & single threaded ``MultiMap``.
+        """
+        return MultiMap()._merge(
+            (src, dict(freqs))
+            for shard in self._sources
+            for src, freqs in shard.copy().items()
+        )
+
+    # visually represent state of this map.
+    def __repr__(self) -> str:
+        return str(list(self))
+
+    # number & frequency of relationships match another map
+    def __eq__(self, other) -> bool:
+        if isinstance(other, ConcurrentMultiMap):
+            other = other.to_multimap()
+        return self.to_multimap() == other
+
+    # identify if specific source to destination mapping exists.
+    def __contains__(self, item: Relation) -> bool:
+        src, dst = item
+        if src == MultiMap.UNDEFINED:
+            return dst in self._targets[self._shard(dst)]
+        if dst == MultiMap.UNDEFINED:
+            return src in self._sources[self._shard(src)]
+        return dst in self._sources[self._shard(src)].get(src, dict())
+
+    # remove explicit relation or groups or relations.
+    def __delitem__(self, item: Relation) -> 'ConcurrentMultiMap':
+        src, dst = item
+
+        if src != MultiMap.UNDEFINED and dst != MultiMap.UNDEFINED:
+            i, j = self._shard(src), self._shard(dst)
+            first, second = self._locks_of(i, j)
+            with first, second:
+                self._unlink(i, j, src, dst, 1)
+            return self
+
+        if src != MultiMap.UNDEFINED or dst != MultiMap.UNDEFINED:
+            index, node = (self._sources, src) if src != MultiMap.UNDEFINED else (self._targets, dst)
+            self._acquire_all()
+            try:
+                for neighbour, freq in dict(index[self._shard(node)].get(node, dict())).items():
+                    relation = (node, neighbour) if index is self._sources else (neighbour, node)
+                    self._unlink(self._shard(relation[0]), self._shard(relation[1]), *relation, freq)
+            finally:
+                self._release_all()
+            return self
+
+        return self.clear()
+
+    __len__ = size          # cardinality
+    __iter__ = items        # iterable like list
+    __getitem__ = source    # syntactic sugar idexable like list
+    __call__ = source       # syntactic sugar callable like function
+
+    # partition of a specific node.
+    def _shard(self, node: Node) -> int:
+        return hash(node) % len(self._locks)
+
+    # locks of a source & target shard to hold in a globally consistent
+    # order, locking a shared shard only once.
+    def _locks_of(self, i: int, j: int) -> Tuple[ContextManager, ContextManager]:
+        if i == j:
+            return self._locks[i], nullcontext()
+        return self._locks[min(i, j)], self._locks[max(i, j)]
+
+    # hold the locks of all shards in order.
+    def _acquire_all(self) -> None:
+        for lock in self._locks:
+            lock.acquire()
+
+    # let go of the locks of all shards in reverse order.
+    def _release_all(self) -> None:
+        for lock in reversed(self._locks):
+            lock.release()
+
+    # add n duplicates of a relation to both directions. callers must hold
+    # the locks of the source shard i & target shard j.
+    def _link(self, i: int, j: int, src: Node, dst: Node, n: int) -> None:
+        outgoing = self._sources[i].get(src)
+        if outgoing is None:
+            outgoing = self._sources[i][src] = Counter()
+        incoming = self._targets[j].get(dst)
+        if incoming is None:
+            incoming = self._targets[j][dst] = Counter()
+        freq = outgoing.get(dst, 0)
+        outgoing[dst] = incoming[src] = freq + n
+        self._sizes[i] += n
+        self._pairs[i] += not freq
+
+    # remove up to n duplicates of a relation from both directions. callers
+    # must hold the locks of the source shard i & target shard j.
+    def _unlink(self, i: int, j: int, src: Node, dst: Node, n: int) -> None:
+        freq = self._sources[i].get(src, dict()).get(dst, 0)
+        n = min(freq, n)
+        if n > 0:
+            MultiMap._decrement_frequency(self._sources[i], src, dst, n)
+            MultiMap._decrement_frequency(self._targets[j], dst, src, n)
+            self._sizes[i] -= n
+            self._pairs[i] -= n == freq
+
+    # expanded copy of the related nodes of a specific node.
+    def _snapshot(self, index: List[dict], node: Node) -> List[Node]:
+        freqs = dict(index[self._shard(node)].get(node, dict()))
+        return list(chain.from_iterable(starmap(repeat, freqs.items())))
@@ -0,0 +1,479 @@
+#!usr/bin/env python
+
+# External libraries
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from collections.abc import Sequence as SequenceABC
+from functools import cached_property
+from itertools import accumulate, chain, repeat
+from operator import eq
+from typing import Iterable, Iterator, Tuple, Mapping, Sequence, FrozenSet, Optional
+from pyutils.multimap import MultiMap, NeighboursView, Node, Relation, _canonical
+import mmap
+import pickle
+import struct
+import zlib
+
+# Compressed sparse rows of a direction as offsets, neighbour ids & frequencies.
+Rows = Tuple[Sequence[int], Sequence[int], Sequence[int]]
+
+# Array type codes of compressed sparse rows.
+_OFFSET = 'Q'   # 8 byte positions of each node's row
+_ID = 'I'       # 4 byte interned node ids
+_FREQ = 'I'     # 4 byte relation frequencies
+
+# On disk header of magic, version, pickle protocol, nodes, distinct
+# relations, relations & node lookup slots in native byte order.
+_HEADER = struct.Struct('=4sHHQQQQ')
+_MAGIC = b'PYMM'
+_VERSION = 2
+_ALIGN = 8
+
+
+class FrozenMultiMap:
+    """
+    Immutable & compact counterpart of ``MultiMap`` supporting the same
+    readonly interface. Nodes are interned to integer ids & the forward
+    & backward relationships are stored as compressed sparse rows of
+    flat arrays rather than as dictionaries of counters.
+
+    Each distinct relationship costs 16 bytes across both directions
+    (a 4 byte neighbour id & a 4 byte frequency each way) & each node
+    costs 16 bytes of row offsets on top of its interned object. So
+    frequencies are limited to 32 bit integers. Since rows are ordered
+    by node ids, iteration follows the order nodes were first seen
+    rather than the order relationships were inserted. Collections of
+    relationships are compressed as they are streamed in without first
+    being tallied into a ``MultiMap``.
+    """
+
+    def __init__(self, items: Iterable[Relation] = None):
+        """
+        Constructor to instantiate a new ``FrozenMultiMap``.
+
+        Args:
+            items: Optional ``MultiMap`` or collection of source &
+                destination nodes to map.
+        """
+        if isinstance(items, MultiMap):
+            self._nodes = list(dict.fromkeys(chain(items._sources, items._targets)))
+            self._ids = {node: i for i, node in enumerate(self._nodes)}
+            self._forward = self._compress(items._sources)
+            self._backward = self._compress(items._targets)
+        else:
+            self._ids = dict()
+            srcs, dsts = array(_ID), array(_ID)
+            for src, dst in items or []:
+                if src == MultiMap.UNDEFINED or dst == MultiMap.UNDEFINED:
+                    continue
+                srcs.append(self._ids.setdefault(src, len(self._ids)))
+                dsts.append(self._ids.setdefault(dst, len(self._ids)))
+            self._nodes = list(self._ids)
+            self._forward = self._sort(srcs, dsts)
+            self._backward = self._sort(dsts, srcs)
+        self._size = sum(self._forward[2])
+        self._pairs = len(self._forward[1])
+        return
+
+    @cached_property
+    def domain(self) -> FrozenSet[Node]:
+        """
+        Retrieves the set of distinct source nodes of this map.
+        """
+        return self._related(self._forward)
+
+    @cached_property
+    def range(self) -> FrozenSet[Node]:
+        """
+        Retrieves the set of distinct target nodes of this map.
+        """
+        return self._related(self._backward)
+
+    @property
+    def nbytes(self) -> int:
+        """
+        Number of bytes used by the compressed rows of this map
+        excluding the interned nodes themselves.
+        """
+        return sum(
+            len(arr) * arr.itemsize
+            for arr in chain(self._forward, self._backward)
+        )
+
+    def items(self) -> Iterable[Relation]:
+        """
+        Retrieves the collection of source & destination relations in this map.
+        """
+        offsets, ids, freqs = self._forward
+        nodes = self._nodes
+        return (
+            (src, nodes[ids[i]])
+            for node_id, src in enumerate(nodes)
+            for i in range(offsets[node_id], offsets[node_id + 1])
+            for _ in range(freqs[i])
+        )
+
+    def source(self, src: Node) -> 'FrozenNeighboursView':
+        """
+        Forward maps from a specific source node & returns a readonly view
+        of its (possibly duplicated) related target nodes if any or empty
+        otherwise.
+        """
+        return FrozenNeighboursView(self, self._forward, src)
+
+    def target(self, dst: Node) -> 'FrozenNeighboursView':
+        """
+        Backwards maps from a specific target node & returns a readonly view
+        of its (possibly duplicated) related source nodes if any or empty
+        otherwise.
+        """
+        return FrozenNeighboursView(self, self._backward, dst)
+
+    def size(self, distinct: bool = False) -> int:
+        """
+        Number of relationships in this map.
+
+        Args:
+            distinct: To only count unique source & destination pairs
+                rather than every duplicated relationship.
+        """
+        return self._pairs if distinct else self._size
+
+    def inverse(self, copy: bool = True, view: bool = False) -> 'FrozenMultiMap':
+        """
+        Reverses source & destination direction mapping of all
+        relationships in this map. Since this map is immutable, the
+        result always shares the storage of this map in constant time.
+        """
+        inverse = object.__new__(self.__class__)
+        inverse.__dict__.update(
+            (key, val)
+            for key, val in self.__dict__.items()
+            if key not in {'domain', 'range'}
+        )
+        inverse._forward, inverse._backward = self._backward, self._forward
+        return inverse
+
+    def copy(self) -> 'FrozenMultiMap':
+        """
+        Same instance since this map is immutable.
+        """
+        return self
+
+    def save(self, path: str) -> 'FrozenMultiMap':
+        """
+        Writes this map to a binary file that can be memory mapped back by
+        ``open()``. The file holds a node dictionary followed by the forward
+        & backward compressed rows in native byte order. Only ``None``,
+        ``bool``, ``int``, ``float``, ``str``, ``bytes`` & (nested) tuples
+        of them are supported as nodes so that equal nodes are found back
+        regardless of their type or representation.
+
+        Args:
+            path: Location of the file to (over)write.
+
+        Returns:
+            result: Same instance of this map.
+        """
+        hashes = [zlib.crc32(_canonical(node)) for node in self._nodes]
+        keys = [pickle.dumps(node, protocol=pickle.HIGHEST_PROTOCOL) for node in self._nodes]
+        key_offsets = array(_OFFSET, [0])
+        for key in keys:
+            key_offsets.append(key_offsets[-1] + len(key))
+
+        slots = array(_ID, repeat(0, _capacity(len(keys))))
+        mask = len(slots) - 1
+        for node_id, key_hash in enumerate(hashes):
+            slot = key_hash & mask
+            while slots[slot]:
+                slot = (slot + 1) & mask
+            slots[slot] = node_id + 1
+
+        with open(path, 'wb') as file:
+            file.write(_HEADER.pack(
+                _MAGIC, _VERSION, pickle.HIGHEST_PROTOCOL,
+                len(keys), self._pairs, self._size, len(slots),
+            ))
+            for section in (key_offsets, slots, *self._forward, *self._backward):
+                file.write(section.tobytes())
+                file.write(bytes(-file.tell() % _ALIGN))
+            for key in keys:
+                file.write(key)
+        return self
+
+    @classmethod
+    def open(cls, path: str) -> 'FrozenMultiMap':
+        """
+        Memory maps a binary file written by ``save()`` as a readonly map
+        in constant time. Rows & nodes are only read from the file as they
+        are looked up, so processes opening the same file share its pages.
+        Nodes are stored pickled so only open files from trusted sources.
+        The file stays mapped until the map is ``close()``-d or exits its
+        ``with`` block.
+
+        Args:
+            path: Location of the file to read.
+        """
+        with open(path, 'rb') as file:
+            buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, protocol, n_nodes, pairs, size, n_slots = _HEADER.unpack_from(buffer)
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError(f"Invalid multimap file: {path}")
+
+        view = memoryview(buffer)
+        position = _HEADER.size
+        sections = []
+        for typecode, count in (
+            (_OFFSET, n_nodes + 1), (_ID, n_slots),
+            (_OFFSET, n_nodes + 1), (_ID, pairs), (_FREQ, pairs),
+            (_OFFSET, n_nodes + 1), (_ID, pairs), (_FREQ, pairs),
+        ):
+            end = position + count * array(typecode).itemsize
+            sections.append(view[position:end].cast(typecode))
+            position = end + (-end % _ALIGN)
+
+        mapping = object.__new__(cls)
+        mapping._nodes = mapping._ids = _DiskNodes(
+            view[position:], sections[0], sections[1], protocol,
+        )
+        mapping._forward = tuple(sections[2:5])
+        mapping._backward = tuple(sections[5:8])
+        mapping._size = size
+        mapping._pairs = pairs
+        mapping._buffer = buffer
+        mapping._views = [view, *sections, mapping._nodes._keys]
+        return mapping
+
+    def close(self) -> None:
+        """
+        Unmaps the file of a map opened by ``open()`` after which the map
+        (& its inverses) can no longer be used. No effect otherwise.
+        """
+        buffer = self.__dict__.pop('_buffer', None)
+        if buffer is not None:
+            for view in self._views:
+                view.release()
+            buffer.close()
+        return
+
+    def to_multimap(self) -> MultiMap:
+        """
+        Materializes this map as a new & mutable ``MultiMap``.
+        """
+        offsets, ids, freqs = self._forward
+        nodes = self._nodes
+        return MultiMap()._merge(
+            (src, {nodes[ids[i]]: freqs[i] for i in range(offsets[node_id], offsets[node_id + 1])})
+            for node_id, src in enumerate(nodes)
+        )
+
+    # visually represent state of this map.
+    def __repr__(self) -> str:
+        return str(list(self))
+
+    # scope a memory mapped map to a with block.
+    def __enter__(self) -> 'FrozenMultiMap':
+        return self
+
+    # unmap the file of a memory mapped map when leaving a with block.
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    # number & frequency of relationships match another map, comparing
+    # rows directly whenever both maps intern their nodes the same way.
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (FrozenMultiMap, MultiMap)):
+            if self._size != other._size or self._pairs != other._pairs:
+                return False
+            if isinstance(other, FrozenMultiMap) and (self._nodes is other._nodes or self._nodes == other._nodes):
+                return all(map(eq, self._forward, other._forward))
+            if isinstance(other, FrozenMultiMap):
+                return all(other.source(src)._counter() == freqs for src, freqs in self._rows())
+            return all(other._sources.get(src) == freqs for src, freqs in self._rows())
+        return self.to_multimap() == other
+
+    # identify if specific source to destination mapping exists.
+    def __contains__(self, item: Relation) -> bool:
+        src, dst = item
+        if src == MultiMap.UNDEFINED:
+            lo, hi = self._bounds(self._backward, dst)
+            return lo < hi
+        if dst == MultiMap.UNDEFINED:
+            lo, hi = self._bounds(self._forward, src)
+            return lo < hi
+        return dst in self.source(src)
+
+    __len__ = size          # cardinality
+    __iter__ = items        # iterable like list
+    __getitem__ = source    # syntactic sugar idexable like list
+    __call__ = source       # syntactic sugar callable like function
+
+    # compress a direction of a map's index into rows by interned node ids.
+    def _compress(self, index: Mapping[Node, Mapping[Node, int]]) -> Rows:
+        offsets, ids, freqs = array(_OFFSET, [0]), array(_ID), array(_FREQ)
+        for node in self._nodes:
+            row = sorted(
+                (self._ids[neighbour], freq)
+                for neighbour, freq in index.get(node, dict()).items()
+            )
+            ids.extend(node_id for node_id, _ in row)
+            freqs.extend(freq for _, freq in row)
+            offsets.append(len(ids))
+        return offsets, ids, freqs
+
+    # compressed rows of parallel node & neighbour ids bucketed by node
+    # before counting the duplicated neighbours of each row.
+    def _sort(self, keys: Sequence[int], values: Sequence[int]) -> Rows:
+        starts = array(_OFFSET, bytes(8 * (len(self._nodes) + 1)))
+        for key in keys:
+            starts[key + 1] += 1
+        starts = array(_OFFSET, accumulate(starts))
+        cursors, buckets = starts[:-1], array(_ID, bytes(4 * len(keys)))
+        for key, value in zip(keys, values):
+            buckets[cursors[key]] = value
+            cursors[key] += 1
+
+        offsets, ids, freqs = array(_OFFSET, [0]), array(_ID), array(_FREQ)
+        for start, end in zip(starts, starts[1:]):
+            row = sorted(Counter(buckets[start:end]).items())
+            ids.extend(node_id for node_id, _ in row)
+            freqs.extend(freq for _, freq in row)
+            offsets.append(len(ids))
+        return offsets, ids, freqs
+
+    # source nodes & frequencies of their non empty forward rows.
+    def _rows(self) -> Iterator[Tuple[Node, Mapping[Node, int]]]:
+        offsets, ids, freqs = self._forward
+        nodes = self._nodes
+        return (
+            (nodes[node_id], dict(zip(map(nodes.__getitem__, ids[lo:hi]), freqs[lo:hi])))
+            for node_id, (lo, hi) in enumerate(zip(offsets, offsets[1:]))
+            if lo < hi
+        )
+
+    # nodes with non empty rows.
+    def _related(self, rows: Rows) -> FrozenSet[Node]:
+        offsets = rows[0]
+        return frozenset(
+            node
+            for node_id, node in enumerate(self._nodes)
+            if offsets[node_id] < offsets[node_id + 1]
+        )
+
+    # bounds of the row of a specific node or empty if unknown.
+    def _bounds(self, rows: Rows, node: Node) -> Tuple[int, int]:
+        node_id = self._ids.get(node)
+        if node_id is None:
+            return 0, 0
+        offsets = rows[0]
+        return offsets[node_id], offsets[node_id + 1]
+
+
+class _DiskNodes(SequenceABC):
+    """
+    Interned nodes of a memory mapped file acting as both the sequence of
+    nodes by id & the mapping of nodes to ids. Nodes are unpickled from
+    the file on access & looked up in an open addressing hash table by a
+    stable hash of their canonical encoding before being confirmed equal.
+    """
+
+    def __init__(self, keys: memoryview, offsets: Sequence[int], slots: Sequence[int], protocol: int):
+        self._keys = keys
+        self._offsets = offsets
+        self._slots = slots
+        self._protocol = protocol
+        return
+
+    # id of a specific node or default if unknown.
+    def get(self, node: Node, dfl: Optional[int] = None) -> Optional[int]:
+        try:
+            key_hash = zlib.crc32(_canonical(node))
+        except TypeError:
+            return dfl      # unsupported nodes are never saved
+        mask = len(self._slots) - 1
+        slot = key_hash & mask
+        while self._slots[slot]:
+            node_id = self._slots[slot] - 1
+            if self[node_id] == node:
+                return node_id
+            slot = (slot + 1) & mask
+        return dfl
+
+    # number of interned nodes.
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    # node of a specific id.
+    def __getitem__(self, node_id: int) -> Node:
+        if not 0 <= node_id < len(self):
+            raise IndexError(node_id)
+        return pickle.loads(self._keys[self._offsets[node_id]:self._offsets[node_id + 1]])
+
+    # files interning identical nodes by identical ids without unpickling them.
+    def __eq__(self, other) -> bool:
+        if isinstance(other, _DiskNodes):
+            return self._offsets == other._offsets and self._keys == other._keys
+        return NotImplemented
+
+    __hash__ = None
+
+
+# Power of 2 number of hash table slots at most half full.
+def _capacity(n: int) -> int:
+    return 1 << (2 * n).bit_length()
+
+
+class FrozenNeighboursView(NeighboursView):
+    """
+    Readonly view of the (possibly duplicated) nodes related to a
+    specific source or target node of a ``FrozenMultiMap``. Lookups
+    binary search the node's compressed row.
+    """
+
+    def __init__(self, mapping: FrozenMultiMap, rows: Rows, node: Node):
+        self._mapping = mapping
+        self._rows = rows
+        self._node = node
+        return
+
+    def distinct(self) -> Iterable[Node]:
+        """
+        Retrieves the distinct related nodes without their duplicates.
+        """
+        lo, hi = self._mapping._bounds(self._rows, self._node)
+        return [self._mapping._nodes[node_id] for node_id in self._rows[1][lo:hi]]
+
+    # number of related nodes including duplicates.
+    def __len__(self) -> int:
+        lo, hi = self._mapping._bounds(self._rows, self._node)
+        return sum(self._rows[2][lo:hi])
+
+    # whether any node is related.
+    def __bool__(self) -> bool:
+        lo, hi = self._mapping._bounds(self._rows, self._node)
+        return lo < hi
+
+    # expanded related nodes like a list.
+    def __iter__(self) -> Iterator[Node]:
+        lo, hi = self._mapping._bounds(self._rows, self._node)
+        _, ids, freqs = self._rows
+        nodes = self._mapping._nodes
+        return chain.from_iterable(
+            repeat(nodes[ids[i]], freqs[i])
+            for i in range(lo, hi)
+        )
+
+    # identify if specific node is related.
+    def __contains__(self, node: Node) -> bool:
+        node_id = self._mapping._ids.get(node)
+        if node_id is None:
+            return False
+        lo, hi = self._mapping._bounds(self._rows, self._node)
+        i = bisect_left(self._rows[1], node_id, lo, hi)
+        return i < hi and self._rows[1][i] == node_id
+
+    # frequencies of related nodes or empty if unknown.
+    def _counter(self) -> Mapping[Node, int]:
+        lo, hi = self._mapping._bounds(self._rows, self._node)
+        return dict(zip(self.distinct(), self._rows[2][lo:hi]))
@@ -1,13 +1,30 @@
 #!usr/bin/env python
 
 # External libraries
-from collections import Counter
-from typing import Iterable, Tuple, List, Any, Set
-from functools import cached_property, reduce
+from collections import Counter, defaultdict, deque
+from collections.abc import Set, Collection
+from decimal import Decimal
+from types import MappingProxyType
+from typing import Iterable, Iterator, Tuple, List, Any, Mapping, Callable, Dict, Set as SetType, Union
+from functools import cached_property, partial
+from hashlib import blake2b
+from itertools import chain, islice, repeat
+from operator import attrgetter, mul, setitem
+import csv
+import gzip
+import json
+import numbers
+import os
+import random
+import struct
 
 # Helper types to self document individual mappings
 Node = Any
 Relation = Tuple[Node, Node]
+Patch = List[Tuple[Node, Node, int]]
+Batch = Union[Dict[Node, 'NeighboursView'], Tuple[List[int], List[Node]], SetType[Node]]
+Totals = Tuple[int, int, int, int]  # relations, distinct relations & hashes of either direction
+State = Tuple[List[Node], List[dict], int, Totals]  # sources, their frequencies, hash seed & totals
 
 
 class MultiMap:
@@ -39,11 +56,45 @@ class MultiMap:
         """
         self._sources = dict()  # outgoing frequencies
         self._targets = dict()  # incoming frequencies
-        self._items = None      # state of iteration
-        for src, dst in items or []:
-            self.add(src, dst)
+        self._size = 0          # total relations including duplicates
+        self._pairs = 0         # distinct source to destination relations
+        self._forward_hash = 0  # order independent hash of relations
+        self._backward_hash = 0  # order independent hash of reversed relations
+        self._digests = None    # stable digests of relations & reversed relations once fingerprinted
+        self._weights = (dict(), dict())  # outgoing & incoming relations per node
+        self._buckets = None    # nodes by outgoing & incoming relations once queried
+        self._samplers = None   # random access indices of relations once sampled
+        self._shared = False    # copy on write of indices shared with other maps
+        self._owned = (set(), set())  # source & target keys with unshared counters
+        self._journal = None    # net frequency changes of relations since checkpoint
+        self.update(items or [])
         return
 
+    @classmethod
+    def from_pairs(cls, items: Iterable[Relation]) -> 'MultiMap':
+        """
+        Bulk constructs a new ``MultiMap`` from a collection of source &
+        destination relationships. Equivalent to the constructor.
+
+        Args:
+            items: Collection of source & destination nodes to map.
+        """
+        return cls().update(items)
+
+    @classmethod
+    def from_grouped(cls, groups: Mapping[Node, Iterable[Node]]) -> 'MultiMap':
+        """
+        Bulk constructs a new ``MultiMap`` from source nodes that are
+        already grouped with their (possibly duplicated) destinations.
+
+        Args:
+            groups: Mapping of each source node to its destination nodes.
+        """
+        return cls()._merge(
+            (src, Counter(dsts))
+            for src, dsts in groups.items()
+        )
+
     @cached_property
     def UNDEFINED(self):
         """
@@ -53,23 +104,35 @@ class MultiMap:
         return object()
 
     @property
-    def domain(self) -> Set[Node]:
+    def domain(self) -> 'NodesView':
         """
-        Retrieves the current set of distinct source nodes of this map.
+        Retrieves a live readonly set like view of the distinct source
+        nodes of this map. Use ``set(map.domain)`` for a snapshot.
         """
-        return set(self._sources.keys())
+        return NodesView(self, _SOURCES)
 
     @property
-    def range(self) -> Set[Node]:
+    def range(self) -> 'NodesView':
         """
-        Retrieves the current set of distinct target nodes of this map.
+        Retrieves a live readonly set like view of the distinct target
+        nodes of this map. Use ``set(map.range)`` for a snapshot.
         """
-        return set(self._targets.keys())
+        return NodesView(self, _TARGETS)
 
-    def items(self) -> Iterable[Relation]:
+    def items(self, with_counts: bool = False) -> Iterable[Relation]:
         """
         Retrieves the current collection of source & destination relations in this map.
+
+        Args:
+            with_counts: To retrieve each distinct relation once along with its
+                frequency as ``(src, dst, freq)`` rather than every duplicate.
         """
+        if with_counts:
+            return (
+                (src, dst, freq)
+                for src, ctr in self._sources.items()
+                for dst, freq in ctr.items()
+            )
         return (
             (src, dst)
             for src, ctr in self._sources.items()
@@ -77,55 +140,366 @@ class MultiMap:
             for _ in range(freq)
         )
 
-    def source(self, src: Node) -> List[Node]:
+    def source(self, src: Node) -> 'NeighboursView':
         """
-        Forward maps from a specific source node & returns its collection
-        of related target nodes if any or empty otherwise.
+        Forward maps from a specific source node & returns a live readonly
+        view of its (possibly duplicated) related target nodes if any or
+        empty otherwise. Use ``.to_list()`` on the view for a snapshot.
         """
-        return [
-            dst
-            for dst, freq in self._sources.get(src, dict()).items()
-            for _ in range(freq)
-        ]
+        return NeighboursView(self, _SOURCES, src)
 
-    def target(self, dst: Node) -> List[Node]:
+    def target(self, dst: Node) -> 'NeighboursView':
         """
-        Backwards maps from a specific target node & returns its collection
-        of related source nodes if any or empty otherwise.
+        Backwards maps from a specific target node & returns a live readonly
+        view of its (possibly duplicated) related source nodes if any or
+        empty otherwise. Use ``.to_list()`` on the view for a snapshot.
         """
-        return [
-            src
-            for src, freq in self._targets.get(dst, dict()).items()
-            for _ in range(freq)
-        ]
+        return NeighboursView(self, _TARGETS, dst)
+
+    def source_many(self, srcs: Iterable[Node], how: str = "dict") -> 'Batch':
+        """
+        Forward maps from many source nodes at once in a single pass.
+
+        Args:
+            srcs: Collection of source nodes to lookup.
+            how: Layout of the results being either ``"dict"`` of each
+                source to a view of its related targets, ``"flat"``
+                ``(offsets, targets)`` pair where the (possibly duplicated)
+                targets of the i-th source lie between ``offsets[i]`` &
+                ``offsets[i + 1]`` or ``"union"`` set of distinct targets
+                related to any of the sources.
+        """
+        return self._lookup_many(_SOURCES, srcs, how)
+
+    def target_many(self, dsts: Iterable[Node], how: str = "dict") -> 'Batch':
+        """
+        Backwards maps from many target nodes at once in a single pass.
+        Results are laid out as per ``source_many()``.
+
+        Args:
+            dsts: Collection of target nodes to lookup.
+            how: Layout of the results as ``"dict"``, ``"flat"`` or ``"union"``.
+        """
+        return self._lookup_many(_TARGETS, dsts, how)
+
+    def sources_with_all(self, dsts: Iterable[Node]) -> SetType[Node]:
+        """
+        Retrieves the distinct source nodes related to every one of many
+        target nodes. Related sources of the targets are intersected from
+        the fewest to the most with an early exit once nothing is left, so
+        the cost is close to that of the rarest target.
+
+        Args:
+            dsts: Collection of target nodes to match.
+        """
+        dsts = set(dsts)
+        return self._matching(self._targets, dsts, len(dsts))
+
+    def sources_with_any(self, dsts: Iterable[Node]) -> SetType[Node]:
+        """
+        Retrieves the distinct source nodes related to at least one of many
+        target nodes. Equivalent to ``target_many(dsts, how="union")``.
+
+        Args:
+            dsts: Collection of target nodes to match.
+        """
+        return self._lookup_many(_TARGETS, dsts, "union")
+
+    def sources_with_at_least(self, dsts: Iterable[Node], k: int) -> SetType[Node]:
+        """
+        Retrieves the distinct source nodes related to at least ``k`` of many
+        distinct target nodes. Only sources of the ``n - k + 1`` rarest
+        targets can qualify, so those are the only candidates counted
+        against the remaining targets.
+
+        Args:
+            dsts: Collection of target nodes to match.
+            k: Minimum number of distinct matching targets.
+        """
+        return self._matching(self._targets, set(dsts), k)
+
+    def targets_with_all(self, srcs: Iterable[Node]) -> SetType[Node]:
+        """
+        Retrieves the distinct target nodes related to every one of many
+        source nodes. See ``sources_with_all()``.
+
+        Args:
+            srcs: Collection of source nodes to match.
+        """
+        srcs = set(srcs)
+        return self._matching(self._sources, srcs, len(srcs))
+
+    def targets_with_any(self, srcs: Iterable[Node]) -> SetType[Node]:
+        """
+        Retrieves the distinct target nodes related to at least one of many
+        source nodes. Equivalent to ``source_many(srcs, how="union")``.
+
+        Args:
+            srcs: Collection of source nodes to match.
+        """
+        return self._lookup_many(_SOURCES, srcs, "union")
+
+    def targets_with_at_least(self, srcs: Iterable[Node], k: int) -> SetType[Node]:
+        """
+        Retrieves the distinct target nodes related to at least ``k`` of many
+        distinct source nodes. See ``sources_with_at_least()``.
+
+        Args:
+            srcs: Collection of source nodes to match.
+            k: Minimum number of distinct matching sources.
+        """
+        return self._matching(self._sources, set(srcs), k)
+
+    def compose(self, other: 'MultiMap') -> 'MultiMap':
+        """
+        Relationally joins the targets of this map with the sources of
+        another such that every ``(a, b)`` of this map & ``(b, c)`` of the
+        other yield ``(a, c)`` with their frequencies multiplied & summed
+        across all intermediate ``b`` nodes. Only intermediate nodes shared
+        by both maps are visited & each distinct pair is joined once so work
+        is proportional to the relationships produced rather than to the
+        duplicated paths enumerated.
+
+        Args:
+            other: Map whose sources are the targets of this map.
+
+        Returns:
+            result: A new mapping from sources of this map to targets of the other.
+        """
+        middles = self._targets.keys() & other._sources.keys()
+        joined = dict()
+        for middle in middles:
+            outgoing = other._sources[middle]
+            for src, freq in self._targets[middle].items():
+                freqs = joined.setdefault(src, Counter())
+                for dst, other_freq in outgoing.items():
+                    freqs[dst] += freq * other_freq
+        return MultiMap()._merge(joined.items())
+
+    def reachable(self, nodes: Iterable[Node], hops: int = None, direction: str = "forward") -> SetType[Node]:
+        """
+        Traverses relationships from many nodes at once by expanding a
+        whole frontier of distinct nodes per hop so that nodes shared by
+        many paths are only expanded once.
+
+        Args:
+            nodes: Collection of nodes to start traversing from.
+            hops: Maximum number of relationships to traverse or unbounded if ``None``.
+            direction: Follow relationships ``"forward"`` from sources to
+                targets, ``"backward"`` from targets to sources or ``"both"``.
+
+        Returns:
+            result: Set of nodes reachable within the number of hops other
+                than the starting nodes themselves.
+        """
+        indices = {
+            "forward": (_SOURCES,),
+            "backward": (_TARGETS,),
+            "both": (_SOURCES, _TARGETS),
+        }.get(direction)
+        if indices is None:
+            raise ValueError(f"Invalid traversal direction: {direction}")
+
+        start = set(nodes)
+        frontier, visited = start, set(start)
+        hop = 0
+        while frontier and (hops is None or hop < hops):
+            frontier = set().union(*(
+                index(self).get(node, _EMPTY).keys()
+                for index in indices
+                for node in frontier
+            )) - visited
+            visited |= frontier
+            hop += 1
+        return visited - start
+
+    def out_degree(self, src: Node, distinct: bool = False) -> int:
+        """
+        Number of relationships from a specific source node in constant time.
+
+        Args:
+            src: Source node.
+            distinct: To only count its unique target nodes rather than
+                every duplicated relationship.
+        """
+        return len(self._sources.get(src, _EMPTY)) if distinct else self._weights[0].get(src, 0)
+
+    def in_degree(self, dst: Node, distinct: bool = False) -> int:
+        """
+        Number of relationships to a specific target node in constant time.
+
+        Args:
+            dst: Target node.
+            distinct: To only count its unique source nodes rather than
+                every duplicated relationship.
+        """
+        return len(self._targets.get(dst, _EMPTY)) if distinct else self._weights[1].get(dst, 0)
+
+    def hubs(self, k: int = 10, direction: str = "forward") -> List[Tuple[Node, int]]:
+        """
+        Retrieves the nodes with the most (possibly duplicated) relationships
+        without scanning the map. Nodes are indexed by their number of
+        relationships on the first such query & kept up to date as the map
+        is modified thereafter.
+
+        Args:
+            k: Maximum number of nodes to retrieve.
+            direction: Rank source nodes by their ``"forward"`` relationships
+                or target nodes by their ``"backward"`` relationships.
+
+        Returns:
+            result: Nodes & their number of relationships by decreasing
+                number of relationships. Ties are in no particular order.
+        """
+        buckets = self._degree_buckets()[_side(direction)]
+        result = []
+        for weight in sorted(buckets, reverse=True):
+            for node in buckets[weight]:
+                if len(result) >= k:
+                    return result
+                result.append((node, weight))
+        return result
+
+    def degree_histogram(self, direction: str = "forward") -> Dict[int, int]:
+        """
+        Counts the nodes having each number of (possibly duplicated)
+        relationships without scanning the map. See ``hubs()``.
+
+        Args:
+            direction: Count source nodes by their ``"forward"`` relationships
+                or target nodes by their ``"backward"`` relationships.
+        """
+        return {
+            weight: len(nodes)
+            for weight, nodes in self._degree_buckets()[_side(direction)].items()
+        }
+
+    def sample(self, k: int = 1, weighted: bool = True, rng: random.Random = None) -> List[Relation]:
+        """
+        Draws random relationships with replacement without materializing
+        the map. Random access indices of the relationships are built on
+        the first draw & kept up to date as the map is modified thereafter,
+        so each subsequent draw takes at most logarithmic time.
+
+        Args:
+            k: Number of relationships to draw.
+            weighted: To draw relationships proportionally to their
+                frequency rather than uniformly among distinct ones.
+            rng: Optional source of randomness for reproducible draws.
+
+        Returns:
+            result: Drawn source & destination relations.
+        """
+        sizes, pairs, neighbours = self._sampling()
+        rng = rng or random
+        if weighted:
+            sources = (sizes.weighted_choice(rng) for _ in range(k))
+            return [(src, neighbours[src].weighted_choice(rng)) for src in sources]
+        sources = (pairs.weighted_choice(rng) for _ in range(k))
+        return [(src, neighbours[src].choice(rng)) for src in sources]
+
+    def sample_source(self, weighted: bool = True, rng: random.Random = None) -> Node:
+        """
+        Draws a random source node. See ``sample()``.
+
+        Args:
+            weighted: To draw source nodes proportionally to their number of
+                relationships rather than uniformly among distinct ones.
+            rng: Optional source of randomness for reproducible draws.
+        """
+        sizes, _, _ = self._sampling()
+        rng = rng or random
+        return sizes.weighted_choice(rng) if weighted else sizes.choice(rng)
+
+    def sample_neighbour(self, src: Node, weighted: bool = True, rng: random.Random = None) -> Node:
+        """
+        Draws a random target node related to a specific source node.
+        See ``sample()``.
+
+        Args:
+            src: Source node.
+            weighted: To draw target nodes proportionally to the frequency
+                of their relationship rather than uniformly among distinct ones.
+            rng: Optional source of randomness for reproducible draws.
+        """
+        _, _, neighbours = self._sampling()
+        rng = rng or random
+        sampler = neighbours.get(src, _NO_SAMPLES)
+        return sampler.weighted_choice(rng) if weighted else sampler.choice(rng)
+
+    def count(self, src: Node, dst: Node) -> int:
+        """
+        Number of identical relationships from a source to a destination
+        node in constant time.
+
+        Args:
+            src: Source node. Counts all relationships to a destination when it is ``MultiMap.UNDEFINED``
+            dst: Destination node. Counts all relationships from a source when it is ``MultiMap.UNDEFINED``
+        """
+        if src == MultiMap.UNDEFINED:
+            return self.in_degree(dst) if dst != MultiMap.UNDEFINED else self._size
+        if dst == MultiMap.UNDEFINED:
+            return self.out_degree(src)
+        return self._sources.get(src, _EMPTY).get(dst, 0)
 
-    def size(self) -> int:
+    def fingerprint(self) -> int:
         """
-        Number of relationships in this map.
+        Order independent digest of the relationships & their frequencies
+        in this map. This digest is computed in linear time on the first
+        request after each modification & cached until the next one, so
+        modifications stay as cheap as without it. Maps with equal
+        relationships share the same fingerprint, across processes too
+        when their nodes are ``None``, numbers, strings, bytes or tuples of
+        them, making it usable as a cache key of results derived from this
+        map's current state. Equal fingerprints do not guarantee equal
+        maps though, as distinct maps may still rarely collide.
         """
-        return sum(1 for _ in self)  # unfolded out
+        return self._fingerprint(0)
 
-    def inverse(self, copy: bool = True) -> 'MultiMap':
+    def size(self, distinct: bool = False) -> int:
+        """
+        Number of relationships in this map. This count is maintained
+        as the map is modified so it is retrieved in constant time.
+
+        Args:
+            distinct: To only count unique source & destination pairs
+                rather than every duplicated relationship.
+        """
+        return self._pairs if distinct else self._size
+
+    def inverse(self, copy: bool = True, view: bool = False) -> 'MultiMap':
         """
         Reverses source & destination direction mapping of all
         relationships in this map.
 
         Args:
             copy: To perform operation in new map or in place.
+            view: To instead return a constant time readonly view sharing
+                the storage of this map with source & destination roles
+                swapped. Takes precedence over ``copy``.
 
         Returns:
             result: A mapping with source & destination nodes reversed.
                 Same instance whenever ``copy=False``
         """
+        if view:
+            return InverseView(self)
         if copy:
-            return MultiMap(
-                (dst, src)
-                for src, dst in self
-            )
+            return MultiMap()._merge(self._targets.items())
+        if self._journal is not None:
+            for src, dst, freq in self.items(with_counts=True):
+                self._record(src, dst, -freq)
+                self._record(dst, src, freq)
         self._sources, self._targets = self._targets, self._sources
+        self._forward_hash, self._backward_hash = self._backward_hash, self._forward_hash
+        self._digests = self._digests and self._digests[::-1]
+        self._owned = self._owned and self._owned[::-1]
+        self._weights = self._weights[::-1]
+        self._buckets = self._buckets and self._buckets[::-1]
+        self._samplers = None
         return self
 
-    def add(self, src: Node, dst: Node) -> 'MultiMap':
+    def add(self, src: Node, dst: Node, count: int = 1) -> 'MultiMap':
         """
         Inplace inserts a specific relationship to this map even if
         an identical one already exists.
@@ -133,30 +507,91 @@ class MultiMap:
         Args:
             src: Source node
             dst: Destination node
+            count: Number of identical relationships to insert at once.
 
         Returns:
             result: Modified instance of this map.
         """
-        if src != MultiMap.UNDEFINED and dst != MultiMap.UNDEFINED:
-            self._sources.setdefault(src, Counter()).update([dst])
-            self._targets.setdefault(dst, Counter()).update([src])
+        if count < 0:
+            raise ValueError(f"Invalid count: {count}")
+        if src != MultiMap.UNDEFINED and dst != MultiMap.UNDEFINED and count:
+            self._link(src, dst, count)
         return self
 
-    def remove(self, src: Node, dst: Node) -> 'MultiMap':
+    def update(self, items: Iterable[Relation]) -> 'MultiMap':
+        """
+        Inplace inserts a collection of relationships to this map in bulk.
+        Duplicate relationships are first tallied together so that each
+        distinct relationship is only indexed once in either direction.
+
+        Args:
+            items: Collection of source & destination nodes to map.
+
+        Returns:
+            result: Modified instance of this map.
+        """
+        if isinstance(items, MultiMap):
+            return self._merge(items._sources.items())
+        if isinstance(items, InverseView):
+            grouped = items._mapping._targets.items()
+            if items._mapping is self:
+                grouped = [(dst, dict(freqs)) for dst, freqs in grouped]
+            return self._merge(grouped)
+
+        grouped = dict()
+        for (src, dst), freq in Counter(items).items():
+            grouped.setdefault(src, dict())[dst] = freq
+        return self._merge(grouped.items())
+
+    def remove(self, src: Node, dst: Node, count: int = 1) -> 'MultiMap':
         """
         Inplace deletes specific relationships from this map.
-        When multiple identical relationships exists, only 1 is removed.
-        No effect if the relationship does not exists.
+        When multiple identical relationships exists, only ``count`` are
+        removed. No effect if the relationship does not exists.
 
         Args:
             src: Source node. Removes all mappings from a destination when it is ``MultiMap.UNDEFINED``
             dst: Destination node. Removes all mappings from a source when it is ``MultiMap.UNDEFINED``
+            count: Maximum number of identical relationships to remove at once.
 
         Returns:
             result: Modified instance of this map.
         """
+        if count < 0:
+            raise ValueError(f"Invalid count: {count}")
+        if src != MultiMap.UNDEFINED and dst != MultiMap.UNDEFINED:
+            self._unlink(src, dst, count)
+            return self
         return self.__delitem__((src, dst))
 
+    def remove_many(self, items: Iterable[Relation]) -> 'MultiMap':
+        """
+        Inplace deletes a collection of relationships from this map in bulk.
+        Each occurrence of a relationship removes 1 identical relationship
+        from this map, with the same ``MultiMap.UNDEFINED`` semantics as
+        ``remove()``. No effect for relationships that do not exist.
+
+        Args:
+            items: Collection of source & destination nodes to unmap.
+
+        Returns:
+            result: Modified instance of this map.
+        """
+        if items is self:
+            return self.clear()
+
+        if isinstance(items, MultiMap):
+            for src, dst, _, freq in self._overlap(items):
+                self._unlink(src, dst, freq)
+            return self
+
+        for (src, dst), freq in Counter(items).items():
+            if src == MultiMap.UNDEFINED or dst == MultiMap.UNDEFINED:
+                self.__delitem__((src, dst))
+            else:
+                self._unlink(src, dst, freq)
+        return self
+
     def clear(self) -> 'MultiMap':
         """
         Inplace deletes all relationships in this map.
@@ -164,72 +599,417 @@ class MultiMap:
         Returns:
             result: Modified instance of this map.
         """
-        self._sources.clear()
-        self._targets.clear()
+        if self._journal is not None:
+            for src, dst, freq in self.items(with_counts=True):
+                self._record(src, dst, -freq)
+        self._sources = dict()
+        self._targets = dict()
+        self._size = 0
+        self._pairs = 0
+        self._forward_hash = 0
+        self._backward_hash = 0
+        self._digests = None
+        self._weights = (dict(), dict())
+        self._buckets = None
+        self._samplers = None
+        self._shared = False
+        self._owned = (set(), set())
         return self
 
     def copy(self) -> 'MultiMap':
         """
-        Creates a new but shallow clone of this mapping.
+        Creates a new but shallow clone of this mapping in constant time.
+        Both maps share their indices as copy on write snapshots, so the
+        first modification of either map shallow copies its indices &
+        only duplicates the frequencies of the nodes being modified.
+        """
+        clone = object.__new__(self.__class__)
+        clone.__dict__.update(self.__dict__)
+        clone._journal = None
+        self._share()
+        clone._share()
+        return clone
+
+    def diff(self, other: 'MultiMap') -> Patch:
+        """
+        Computes the changes turning this map into another one such that
+        ``map.apply(map.diff(other)) == other``. Frequencies are compared
+        per source node, skipping sources whose frequencies are still
+        shared with a ``copy()`` of this map, so diffing a snapshot only
+        inspects the sources modified since.
+
+        Args:
+            other: Map to compare against.
+
+        Returns:
+            result: Compact patch of ``(src, dst, delta)`` entries where
+                each delta is the net number of identical relationships to
+                add if positive or remove if negative.
+        """
+        if self._sources is other._sources:
+            return []
+        patch = []
+        for src in self._sources.keys() | other._sources.keys():
+            before = self._sources.get(src, _EMPTY)
+            after = other._sources.get(src, _EMPTY)
+            if before is after:
+                continue
+            for dst in before.keys() | after.keys():
+                delta = after.get(dst, 0) - before.get(dst, 0)
+                if delta:
+                    patch.append((src, dst, delta))
+        return patch
+
+    def apply(self, patch: Iterable[Tuple[Node, Node, int]]) -> 'MultiMap':
+        """
+        Inplace applies a patch of changes from ``diff()`` or
+        ``checkpoint()`` in time proportional to the patch rather than
+        the map. Removals beyond the existing frequency of a relationship
+        have no effect.
+
+        Args:
+            patch: Collection of ``(src, dst, delta)`` entries.
+
+        Returns:
+            result: Modified instance of this map.
+        """
+        for src, dst, delta in patch:
+            if src == MultiMap.UNDEFINED or dst == MultiMap.UNDEFINED:
+                continue
+            if delta > 0:
+                self._link(src, dst, delta)
+            elif delta < 0:
+                self._unlink(src, dst, -delta)
+        return self
+
+    def checkpoint(self, track: bool = True) -> Patch:
+        """
+        Retrieves the changes to this map since the previous checkpoint &
+        starts journaling the next ones. Journaling is disabled until the
+        first checkpoint & is not inherited by copies. Changes are netted
+        per relationship, so replicas can ``apply()`` the patch in time
+        proportional to the distinct relationships modified.
+
+        Args:
+            track: To keep journaling changes after this checkpoint.
+
+        Returns:
+            result: Patch of ``(src, dst, delta)`` entries. Empty when not
+                previously journaling.
+        """
+        journal = self._journal or dict()
+        self._journal = dict() if track else None
+        return [(src, dst, delta) for (src, dst), delta in journal.items() if delta]
+
+    @classmethod
+    def from_file(cls, path: str, fmt: str = None, collapse: bool = True, chunk_size: int = 100_000, encoding: str = 'utf-8') -> 'MultiMap':
+        """
+        Streams relationships from a file into a new map one chunk of rows
+        at a time. Each row holds a source & destination node along with
+        an optional frequency. Gzip compressed files are detected & read
+        transparently.
+
+        Args:
+            path: Location of the file to read.
+            fmt: Format of the file being either ``"csv"``, ``"tsv"`` or
+                ``"jsonl"`` of arrays. Inferred from the file extension
+                if ``None``. Nodes of delimited files are read as strings.
+            collapse: To tally duplicated relationships of each chunk
+                into frequencies before inserting them.
+            chunk_size: Number of rows to read at a time.
+            encoding: Text encoding of the file.
+        """
+        result = cls()
+        with _open(path, 'rt', encoding) as file:
+            rows = _read_rows(file, fmt or _infer_format(path))
+            for chunk in iter(lambda: list(islice(rows, chunk_size)), []):
+                if collapse:
+                    grouped = dict()
+                    for src, dst, freq in chunk:
+                        freqs = grouped.setdefault(src, dict())
+                        freqs[dst] = freqs.get(dst, 0) + freq
+                    result._merge(grouped.items())
+                else:
+                    result._merge((src, {dst: freq}) for src, dst, freq in chunk)
+        return result
+
+    def to_file(self, path: str, fmt: str = None, encoding: str = 'utf-8') -> 'MultiMap':
+        """
+        Streams the relationships of this map to a file as grouped source,
+        destination & frequency rows so duplicates are written once. Files
+        with a ``.gz`` extension are gzip compressed.
+
+        Args:
+            path: Location of the file to (over)write.
+            fmt: Format of the file being either ``"csv"``, ``"tsv"`` or
+                ``"jsonl"``. Inferred from the file extension if ``None``.
+            encoding: Text encoding of the file.
+
+        Returns:
+            result: Same instance of this map.
         """
-        return MultiMap(self)
+        fmt = fmt or _infer_format(path)
+        if fmt not in _FORMATS:
+            raise ValueError(f"Unknown file format: {fmt}")
+        rows = self.items(with_counts=True)
+        with _open(path, 'wt', encoding) as file:
+            if fmt == "jsonl":
+                file.writelines(json.dumps(row) + '\n' for row in rows)
+            else:
+                csv.writer(file, delimiter=_DELIMITERS[fmt], lineterminator='\n').writerows(rows)
+        return self
+
+    @classmethod
+    def from_coo(cls, matrix: Any, sources: List[Node] = None, targets: List[Node] = None) -> 'MultiMap':
+        """
+        Bulk constructs a new ``MultiMap`` from a sparse adjacency matrix of
+        relationship frequencies. Coordinates are sorted & their duplicates
+        summed by vectorized ``numpy`` operations before the forward index
+        is grouped per source & mirrored, so no relationship is linked one
+        at a time. Requires ``numpy``.
+
+        Args:
+            matrix: Either ``(rows, cols, counts)`` arrays of source indices,
+                target indices & frequencies or any ``scipy`` sparse matrix.
+            sources: Distinct source nodes by row index, or the row indices themselves if ``None``.
+            targets: Distinct target nodes by column index, or the column indices themselves if ``None``.
+        """
+        import numpy as np     # optional dependency
+
+        if hasattr(matrix, 'tocoo'):
+            matrix = matrix.tocoo()
+            matrix = (matrix.row, matrix.col, matrix.data)
+        rows, cols, counts = matrix
+        rows = np.asarray(rows, dtype=np.int64)
+        cols = np.asarray(cols, dtype=np.int64)
+        counts = np.asarray(counts, dtype=np.int64)
+        if not rows.shape == cols.shape == counts.shape:
+            raise ValueError("Mismatched lengths of rows, cols & counts")
+
+        # sum frequencies of duplicated coordinates & drop empty ones.
+        order = np.lexsort((cols, rows))
+        rows, cols, counts = rows[order], cols[order], counts[order]
+        starts = np.flatnonzero(np.concatenate((
+            [True], (rows[1:] != rows[:-1]) | (cols[1:] != cols[:-1])
+        ))) if len(rows) else rows
+        counts = np.add.reduceat(counts, starts) if len(starts) else counts
+        rows, cols = rows[starts], cols[starts]
+        keep = counts > 0
+        rows, cols, counts = rows[keep], cols[keep], counts[keep]
+
+        # group target nodes & frequencies of each source node.
+        bounds = np.flatnonzero(rows[1:] != rows[:-1]) + 1
+        bounds = [0, *bounds.tolist(), len(rows)]
+        srcs = rows[bounds[:-1]].tolist() if len(rows) else []
+        dsts = cols.tolist()
+        if sources is not None:
+            srcs = list(map(sources.__getitem__, srcs))
+        if targets is not None:
+            dsts = list(map(targets.__getitem__, dsts))
+        counts = counts.tolist()
+
+        result = cls()
+        result._sources = {
+            src: Counter(dict(zip(dsts[start:end], counts[start:end])))
+            for src, start, end in zip(srcs, bounds, bounds[1:])
+        }
+        return result._mirror()
+
+    def to_coo(self, sparse: bool = False) -> Tuple[Any, List[Node], List[Node]]:
+        """
+        Exports this map as a sparse adjacency matrix in coordinate format
+        where each distinct relationship is a source row, target column &
+        frequency entry. Arrays are filled in bulk straight from the
+        indices without expanding duplicates. Requires ``numpy``.
+
+        Args:
+            sparse: To export a ``scipy.sparse.coo_matrix`` rather than
+                ``(rows, cols, counts)`` arrays. Requires ``scipy``.
+
+        Returns:
+            result: The matrix along with the source nodes by row index &
+                target nodes by column index. Nodes are indexed in the
+                order of ``domain`` & ``range``.
+        """
+        import numpy as np     # optional dependency
+
+        (indptr, cols, counts), sources, targets = self.to_csr()
+        rows = np.repeat(np.arange(len(sources), dtype=np.int64), np.diff(indptr))
+        matrix = (rows, cols, counts)
+        if sparse:
+            from scipy.sparse import coo_matrix     # optional dependency
+            matrix = coo_matrix((counts, (rows, cols)), shape=(len(sources), len(targets)))
+        return matrix, sources, targets
+
+    def to_csr(self, sparse: bool = False) -> Tuple[Any, List[Node], List[Node]]:
+        """
+        Exports this map as a sparse adjacency matrix in compressed row
+        format where the target columns & frequencies of each source row
+        are contiguous. See ``to_coo()``. Requires ``numpy``.
+
+        Args:
+            sparse: To export a ``scipy.sparse.csr_matrix`` rather than
+                ``(indptr, cols, counts)`` arrays. Requires ``scipy``.
+
+        Returns:
+            result: The matrix along with the source nodes by row index &
+                target nodes by column index.
+        """
+        import numpy as np     # optional dependency
+
+        sources = list(self._sources)
+        targets = list(self._targets)
+        ids = {dst: i for i, dst in enumerate(targets)}
+        indptr = np.zeros(len(sources) + 1, dtype=np.int64)
+        np.cumsum(
+            np.fromiter(map(len, self._sources.values()), dtype=np.int64, count=len(sources)),
+            out=indptr[1:],
+        )
+        cols = np.fromiter(
+            map(ids.__getitem__, chain.from_iterable(self._sources.values())),
+            dtype=np.int64, count=self._pairs,
+        )
+        counts = np.fromiter(
+            chain.from_iterable(map(Counter.values, self._sources.values())),
+            dtype=np.int64, count=self._pairs,
+        )
+        matrix = (indptr, cols, counts)
+        if sparse:
+            from scipy.sparse import csr_matrix     # optional dependency
+            matrix = csr_matrix((counts, cols, indptr), shape=(len(sources), len(targets)))
+        return matrix, sources, targets
+
+    def save(self, path: str) -> 'MultiMap':
+        """
+        Writes this map to a compact binary file that can be memory mapped
+        back by ``MultiMap.open()``. See ``FrozenMultiMap.save()``.
+
+        Args:
+            path: Location of the file to (over)write.
+
+        Returns:
+            result: Same instance of this map.
+        """
+        from pyutils.frozenmultimap import FrozenMultiMap  # avoid circular import
+        FrozenMultiMap(self).save(path)
+        return self
+
+    @staticmethod
+    def open(path: str) -> 'FrozenMultiMap':
+        """
+        Memory maps a binary file written by ``save()`` as a readonly
+        ``FrozenMultiMap`` in constant time regardless of its size.
+        See ``FrozenMultiMap.open()``.
+
+        Args:
+            path: Location of the file to read.
+        """
+        from pyutils.frozenmultimap import FrozenMultiMap  # avoid circular import
+        return FrozenMultiMap.open(path)
 
     # visually represent state of this map.
     def __repr__(self) -> str:
         return str(list(self))
 
+    # compactly serialize only the forward frequencies of this map along
+    # with its totals & the hash seed they were computed with.
+    def __getstate__(self) -> State:
+        return (
+            list(self._sources),
+            list(map(dict, self._sources.values())),
+            _SEED,
+            (self._size, self._pairs, self._forward_hash, self._backward_hash),
+        )
+
+    # rebuild both directions of this map in bulk from its forward frequencies.
+    def __setstate__(self, state: State) -> None:
+        self.__init__()
+        self._restore(state)
+        return
+
     # number & frequency of relationships match another
     def __eq__(self, other: 'MultiMap') -> bool:
+        if not isinstance(other, MultiMap):
+            return NotImplemented
         return \
-            isinstance(other, self.__class__) and \
-            self._sources == other._sources and \
-            self._targets == other._targets
+            self._size == other._size and \
+            self._pairs == other._pairs and \
+            self._forward_hash == other._forward_hash and \
+            self._sources == other._sources
 
     # union as new mapping of this & another collection
     def __add__(self, other: 'MultiMap') -> 'MultiMap':
-        return reduce(
-            lambda result, item: result.add(*item),
-            other,
-            MultiMap(self)
-        )
+        return self.copy().update(other)
+
+    # union inplace of this & another collection
+    def __iadd__(self, other: 'MultiMap') -> 'MultiMap':
+        return self.update(other)
 
     # difference as new mapping of this & other collection
     def __sub__(self, other: 'MultiMap') -> 'MultiMap':
-        return reduce(
-            lambda result, item: result.remove(*item),
-            other,
-            MultiMap(self)
+        return self.copy().remove_many(other)
+
+    # difference inplace of this & other collection
+    def __isub__(self, other: 'MultiMap') -> 'MultiMap':
+        return self.remove_many(other)
+
+    # intersection as new mapping keeping the least frequency of shared relations.
+    def __and__(self, other: 'MultiMap') -> 'MultiMap':
+        if not isinstance(other, MultiMap):
+            return NotImplemented
+        return MultiMap()._merge(self._grouped(
+            (src, dst, min(freq, other_freq))
+            for src, dst, freq, other_freq in self._overlap(other)
+        ))
+
+    # intersection inplace keeping the least frequency of shared relations.
+    def __iand__(self, other: 'MultiMap') -> 'MultiMap':
+        if not isinstance(other, MultiMap):
+            return NotImplemented
+        shared = self._grouped(
+            (src, dst, min(freq, other_freq))
+            for src, dst, freq, other_freq in self._overlap(other)
         )
+        return self.clear()._merge(shared)
+
+    # union as new mapping keeping the greatest frequency of all relations.
+    def __or__(self, other: 'MultiMap') -> 'MultiMap':
+        if not isinstance(other, MultiMap):
+            return NotImplemented
+        small, large = (self, other) if self._pairs <= other._pairs else (other, self)
+        return large.copy().__ior__(small)
+
+    # union inplace keeping the greatest frequency of all relations.
+    def __ior__(self, other: 'MultiMap') -> 'MultiMap':
+        if not isinstance(other, MultiMap):
+            return NotImplemented
+        missing = self._grouped(
+            (src, dst, freq - self._sources.get(src, dict()).get(dst, 0))
+            for src, freqs in other._sources.items()
+            for dst, freq in freqs.items()
+        )
+        return self._merge(missing)
 
     # identify if specific source to destination mapping exists.
     def __contains__(self, item: Relation) -> bool:
-        src, dst = item
-        in_src = src in self._sources
-        in_dst = dst in self._targets
-        return \
-            in_src if src != MultiMap.UNDEFINED and dst == MultiMap.UNDEFINED else \
-            in_dst if src == MultiMap.UNDEFINED and dst != MultiMap.UNDEFINED else \
-            in_src and in_dst
+        return self.count(*item) > 0
 
     # remove explicit relation or groups or relations.
     def __delitem__(self, item: Relation) -> 'MultiMap':
         src, dst = item
 
         if src != MultiMap.UNDEFINED and dst != MultiMap.UNDEFINED:
-            self._decrement_frequency(self._sources, src, dst)
-            self._decrement_frequency(self._targets, dst, src)
+            self._unlink(src, dst)
             return self
 
         if src != MultiMap.UNDEFINED:
-            for dst in self._sources[src].keys():
-                self._decrement_frequency(self._targets, dst, src)
-            del self._sources[src]
+            for dst, freq in list(self._sources.get(src, _EMPTY).items()):
+                self._unlink(src, dst, freq)
             return self
 
         if dst != MultiMap.UNDEFINED:
-            for src in self._targets[dst].keys():
-                self._decrement_frequency(self._sources, src, dst)
-            del self._targets[dst]
+            for src, freq in list(self._targets.get(dst, _EMPTY).items()):
+                self._unlink(src, dst, freq)
             return self
 
         return self.clear()
@@ -238,14 +1018,840 @@ class MultiMap:
     __iter__ = items        # iterable like list
     __getitem__ = source    # syntactic sugar idexable like list
     __call__ = source       # syntactic sugar callable like function
+    difference_update = remove_many     # inplace difference like sets
+
+    # index grouped source to destination frequencies in both directions.
+    def _merge(self, grouped: Iterable[Tuple[Node, Mapping[Node, int]]]) -> 'MultiMap':
+        link = self._link
+        for src, freqs in grouped:
+            if src == MultiMap.UNDEFINED:
+                continue
+            for dst, freq in freqs.items():
+                if dst != MultiMap.UNDEFINED and freq > 0:
+                    link(src, dst, freq)
+        return self
+
+    # lookup related nodes of many nodes in one direction of the index.
+    def _lookup_many(self, index: Callable[['MultiMap'], dict], nodes: Iterable[Node], how: str) -> 'Batch':
+        freqs = index(self)
+        if how == "dict":
+            return {node: NeighboursView(self, index, node) for node in nodes}
+        if how == "flat":
+            offsets, values = [0], []
+            for node in nodes:
+                related = freqs.get(node)
+                if related:
+                    values.extend(related.elements())
+                offsets.append(len(values))
+            return offsets, values
+        if how == "union":
+            return set().union(*(freqs.get(node, _EMPTY).keys() for node in nodes))
+        raise ValueError(f"Invalid lookup layout: {how}")
+
+    # nodes related to at least k of some distinct nodes of an index by
+    # counting candidates of the rarest nodes against the rest.
+    def _matching(self, index: Dict[Node, Counter], nodes: SetType[Node], k: int) -> SetType[Node]:
+        if k <= 0:
+            return set(self._sources if index is self._targets else self._targets)
+        related = sorted((index.get(node, _EMPTY) for node in nodes), key=len)
+        rarest = len(related) - k + 1
+        if rarest <= 0:
+            return set()
+
+        matches = set()
+        pending = Counter(chain.from_iterable(related[:rarest]))
+        for left, neighbours in zip(range(k - 1, 0, -1), related[rarest:]):
+            for node, count in list(pending.items()):
+                count += node in neighbours
+                if count >= k:
+                    matches.add(node)
+                    del pending[node]
+                elif count + left - 1 < k:
+                    del pending[node]   # too few nodes left to qualify
+                else:
+                    pending[node] = count
+            if not pending:
+                break
+        matches.update(node for node, count in pending.items() if count >= k)
+        return matches
+
+    # forward frequencies of a serialized state & its totals unless hashed
+    # with another seed by another process.
+    def _restore(self, state: State) -> None:
+        srcs, freqs, seed, totals = state
+        self._sources = _counters(srcs, freqs)
+        self._mirror(totals if seed == _SEED else None)
+
+    # rebuild backward frequencies & counters from the forward frequencies
+    # by only iterating over the relations with builtin functions. Totals
+    # already known are reused rather than recomputed.
+    def _mirror(self, totals: Totals = None) -> 'MultiMap':
+        srcs, dsts, freqs = _flatten(self._sources)
+        targets = _group(dsts, srcs, freqs)
+        if totals is None:
+            totals = (sum(freqs), len(freqs), _hash(srcs, dsts, freqs), _hash(dsts, srcs, freqs))
+        return self._assemble(
+            _counters(targets, targets.values()),
+            (_weigh(self._sources), _weigh(targets)),
+            totals,
+        )
+
+    # adopt backward frequencies, weights & totals consistent with the
+    # forward frequencies of this map built elsewhere.
+    def _assemble(self, targets: Dict[Node, Counter], weights: Tuple[dict, dict], totals: Totals) -> 'MultiMap':
+        self._targets = targets
+        self._weights = weights
+        self._size, self._pairs, self._forward_hash, self._backward_hash = totals
+        self._digests = None
+        self._buckets = None
+        self._samplers = None
+        return self
+
+    # relations shared by this & another map with their respective frequencies
+    # found by scanning whichever map has the fewest distinct relations.
+    def _overlap(self, other: 'MultiMap') -> List[Tuple[Node, Node, int, int]]:
+        swap = other._pairs < self._pairs
+        small, large = (other, self) if swap else (self, other)
+        shared = []
+        for src, freqs in small._sources.items():
+            other_freqs = large._sources.get(src)
+            if not other_freqs:
+                continue
+            for dst, freq in freqs.items():
+                other_freq = other_freqs.get(dst)
+                if other_freq:
+                    shared.append((src, dst, other_freq, freq) if swap else (src, dst, freq, other_freq))
+        return shared
+
+    # collect flat source, destination & frequency triples by source.
+    @staticmethod
+    def _grouped(triples: Iterable[Tuple[Node, Node, int]]) -> List[Tuple[Node, dict]]:
+        grouped = dict()
+        for src, dst, freq in triples:
+            if freq > 0:
+                grouped.setdefault(src, dict())[dst] = freq
+        return list(grouped.items())
+
+    # add n duplicates of a relation to both directions.
+    def _link(self, src: Node, dst: Node, n: int = 1) -> None:
+        if self._shared:
+            self._unshare(src, dst)
+        outgoing = self._sources.get(src)
+        if outgoing is None:
+            outgoing = self._sources[src] = Counter()
+        incoming = self._targets.get(dst)
+        if incoming is None:
+            incoming = self._targets[dst] = Counter()
+        freq = outgoing.get(dst, 0)
+        outgoing[dst] = incoming[src] = freq + n
+        out_weights, in_weights = self._weights
+        out_weights[src] = out_weights.get(src, 0) + n
+        in_weights[dst] = in_weights.get(dst, 0) + n
+        self._size += n
+        self._pairs += not freq
+        self._rehash(src, dst, n)
+        if self._buckets:
+            self._rebucket(src, dst, n)
+        if self._samplers:
+            self._resample(src, dst, n, freq)
+        if self._journal is not None:
+            self._record(src, dst, n)
+
+    # remove up to n duplicates of a relation from both directions.
+    # returns the number of relations actually removed.
+    def _unlink(self, src: Node, dst: Node, n: int = 1) -> int:
+        freq = self._sources.get(src, _EMPTY).get(dst, 0)
+        n = min(freq, n)
+        if n > 0:
+            if self._shared:
+                self._unshare(src, dst)
+            self._decrement_frequency(self._sources, src, dst, n)
+            self._decrement_frequency(self._targets, dst, src, n)
+            self._decrement_weight(self._weights[0], src, n)
+            self._decrement_weight(self._weights[1], dst, n)
+            self._size -= n
+            self._pairs -= n == freq
+            self._rehash(src, dst, -n)
+            if self._buckets:
+                self._rebucket(src, dst, -n)
+            if self._samplers:
+                self._resample(src, dst, -n, freq)
+            if self._journal is not None:
+                self._record(src, dst, -n)
+        return n
+
+    # random access indices of sources by (distinct) relations & of their
+    # targets by frequency. built on first use.
+    def _sampling(self) -> Tuple['_Sampler', '_Sampler', Dict[Node, '_Sampler']]:
+        if self._samplers is None:
+            self._samplers = (
+                _Sampler(self._weights[0].items()),
+                _Sampler((src, len(freqs)) for src, freqs in self._sources.items()),
+                {src: _Sampler(freqs.items()) for src, freqs in self._sources.items()},
+            )
+        return self._samplers
+
+    # shift the sampling weights of a relation of a given prior frequency by n.
+    def _resample(self, src: Node, dst: Node, n: int, freq: int) -> None:
+        sizes, pairs, neighbours = self._samplers
+        sizes.update(src, n)
+        pairs.update(src, (freq + n > 0) - (freq > 0))
+        sampler = neighbours.get(src)
+        if sampler is None:
+            sampler = neighbours[src] = _Sampler()
+        sampler.update(dst, n)
+        if not sampler:
+            del neighbours[src]
+
+    # net a change in frequency of a relation into the journal.
+    def _record(self, src: Node, dst: Node, n: int) -> None:
+        key = (src, dst)
+        self._journal[key] = self._journal.get(key, 0) + n
+
+    # nodes by their outgoing & incoming relations. built on first use.
+    def _degree_buckets(self) -> Tuple[Dict[int, set], Dict[int, set]]:
+        if self._buckets is None:
+            self._buckets = (dict(), dict())
+            for weights, buckets in zip(self._weights, self._buckets):
+                for node, weight in weights.items():
+                    buckets.setdefault(weight, set()).add(node)
+        return self._buckets
 
+    # move source & target nodes to the buckets of their weights after
+    # having been shifted by n relations.
+    def _rebucket(self, src: Node, dst: Node, n: int) -> None:
+        for weights, buckets, node in zip(self._weights, self._buckets, (src, dst)):
+            weight = weights.get(node, 0)
+            if weight != n:
+                bucket = buckets[weight - n]
+                bucket.discard(node)
+                if not bucket:
+                    del buckets[weight - n]
+            if weight:
+                buckets.setdefault(weight, set()).add(node)
+
+    # mark indices as shared with another map so that they are copied
+    # before being modified.
+    def _share(self) -> None:
+        self._shared = True
+        self._owned = None
+        return
+
+    # ensure the indices & the counters of specific source & target nodes
+    # are no longer shared with other maps before modifying them.
+    def _unshare(self, src: Node, dst: Node) -> None:
+        if self._owned is None:
+            self._sources = dict(self._sources)
+            self._targets = dict(self._targets)
+            self._weights = tuple(map(dict, self._weights))
+            self._buckets = self._buckets and tuple(
+                {weight: set(nodes) for weight, nodes in buckets.items()}
+                for buckets in self._buckets
+            )
+            self._samplers = None   # cheaper to rebuild on demand than to copy
+            self._owned = (set(), set())
+        for index, owned, node in zip((self._sources, self._targets), self._owned, (src, dst)):
+            if node not in owned:
+                if node in index:
+                    index[node] = Counter(index[node])
+                owned.add(node)
+        return
+
+    # fold n (possibly negative) duplicates of a relation into the order
+    # independent hashes of the relations in either direction & invalidate
+    # their stable digests.
+    def _rehash(self, src: Node, dst: Node, n: int) -> None:
+        self._forward_hash = (self._forward_hash + n * hash((src, dst))) & _MASK
+        self._backward_hash = (self._backward_hash + n * hash((dst, src))) & _MASK
+        self._digests = None
+
+    # stable digest of the relations in one direction cached until modified.
+    def _fingerprint(self, side: int) -> int:
+        digests = self._digests or (None, None)
+        if digests[side] is None:
+            index = (self._sources, self._targets)[side]
+            digest = sum(
+                freq * _digest(node, neighbour)
+                for node, freqs in index.items()
+                for neighbour, freq in freqs.items()
+            ) & _MASK
+            digests = (digest, digests[1]) if side == 0 else (digests[0], digest)
+            self._digests = digests
+        return digests[side]
+
+    # lower number of relations of an existing node.
+    @staticmethod
+    def _decrement_weight(weights: dict, node: Node, n: int) -> None:
+        remaining = weights[node] - n
+        if remaining > 0:
+            weights[node] = remaining
+        else:
+            del weights[node]
+
+    # lower frequency of an existing relation on one side of the index &
     # ensure source/target keys are removed when no longer linked.
-    # returns true if freq dictionary was modified.
     @staticmethod
-    def _decrement_frequency(freq: dict, k, v) -> bool:
-        if k not in freq:
-            return False
-        freq[k] -= Counter([v])
-        if freq[k] == Counter():
+    def _decrement_frequency(freq: dict, k, v, n: int) -> None:
+        ctr = freq[k]
+        remaining = ctr[v] - n
+        if remaining > 0:
+            ctr[v] = remaining
+            return
+        del ctr[v]
+        if not ctr:
             del freq[k]
-        return True
+
+
+class InverseView:
+    """
+    Live readonly view of a ``MultiMap`` with the source & destination
+    roles of all its relationships swapped. The view shares both indexes
+    of the original map, so it is created in constant time & reflects
+    any subsequent modification of the original. Use ``copy()`` to
+    materialize it as an independent ``MultiMap``. Reads go through the
+    ``MultiMap`` implementations so that maps accounting for their own
+    forward reads, like ``BoundedMultiMap``, don't count those of the view.
+    """
+
+    def __init__(self, mapping: MultiMap):
+        self._mapping = mapping
+        return
+
+    @property
+    def domain(self) -> 'NodesView':
+        """
+        Retrieves a live readonly set like view of the distinct source
+        nodes of this view.
+        """
+        return self._mapping.range
+
+    @property
+    def range(self) -> 'NodesView':
+        """
+        Retrieves a live readonly set like view of the distinct target
+        nodes of this view.
+        """
+        return self._mapping.domain
+
+    def items(self, with_counts: bool = False) -> Iterable[Relation]:
+        """
+        Retrieves the current collection of source & destination relations in this view.
+
+        Args:
+            with_counts: To retrieve each distinct relation once along with its
+                frequency as ``(src, dst, freq)`` rather than every duplicate.
+        """
+        if with_counts:
+            return (
+                (src, dst, freq)
+                for src, ctr in self._mapping._targets.items()
+                for dst, freq in ctr.items()
+            )
+        return (
+            (src, dst)
+            for src, ctr in self._mapping._targets.items()
+            for dst, freq in ctr.items()
+            for _ in range(freq)
+        )
+
+    def source(self, src: Node) -> 'NeighboursView':
+        """
+        Forward maps from a specific source node of this view.
+        """
+        return self._mapping.target(src)
+
+    def target(self, dst: Node) -> 'NeighboursView':
+        """
+        Backwards maps from a specific target node of this view.
+        """
+        return MultiMap.source(self._mapping, dst)
+
+    def sources_with_all(self, dsts: Iterable[Node]) -> SetType[Node]:
+        """
+        Retrieves the source nodes of this view related to every one of many
+        target nodes. See ``MultiMap.sources_with_all()``.
+        """
+        return MultiMap.targets_with_all(self._mapping, dsts)
+
+    def sources_with_any(self, dsts: Iterable[Node]) -> SetType[Node]:
+        """
+        Retrieves the source nodes of this view related to at least one of
+        many target nodes. See ``MultiMap.sources_with_any()``.
+        """
+        return MultiMap.targets_with_any(self._mapping, dsts)
+
+    def sources_with_at_least(self, dsts: Iterable[Node], k: int) -> SetType[Node]:
+        """
+        Retrieves the source nodes of this view related to at least ``k`` of
+        many target nodes. See ``MultiMap.sources_with_at_least()``.
+        """
+        return MultiMap.targets_with_at_least(self._mapping, dsts, k)
+
+    def targets_with_all(self, srcs: Iterable[Node]) -> SetType[Node]:
+        """
+        Retrieves the target nodes of this view related to every one of many
+        source nodes. See ``MultiMap.targets_with_all()``.
+        """
+        return MultiMap.sources_with_all(self._mapping, srcs)
+
+    def targets_with_any(self, srcs: Iterable[Node]) -> SetType[Node]:
+        """
+        Retrieves the target nodes of this view related to at least one of
+        many source nodes. See ``MultiMap.targets_with_any()``.
+        """
+        return MultiMap.sources_with_any(self._mapping, srcs)
+
+    def targets_with_at_least(self, srcs: Iterable[Node], k: int) -> SetType[Node]:
+        """
+        Retrieves the target nodes of this view related to at least ``k`` of
+        many source nodes. See ``MultiMap.targets_with_at_least()``.
+        """
+        return MultiMap.sources_with_at_least(self._mapping, srcs, k)
+
+    def source_many(self, srcs: Iterable[Node], how: str = "dict") -> 'Batch':
+        """
+        Forward maps from many source nodes of this view at once.
+        See ``MultiMap.source_many()``.
+        """
+        return self._mapping.target_many(srcs, how)
+
+    def target_many(self, dsts: Iterable[Node], how: str = "dict") -> 'Batch':
+        """
+        Backwards maps from many target nodes of this view at once.
+        See ``MultiMap.target_many()``.
+        """
+        return MultiMap.source_many(self._mapping, dsts, how)
+
+    def reachable(self, nodes: Iterable[Node], hops: int = None, direction: str = "forward") -> SetType[Node]:
+        """
+        Traverses relationships of this view from many nodes at once.
+        See ``MultiMap.reachable()``.
+        """
+        direction = {"forward": "backward", "backward": "forward"}.get(direction, direction)
+        return self._mapping.reachable(nodes, hops, direction)
+
+    def count(self, src: Node, dst: Node) -> int:
+        """
+        Number of identical relationships from a source to a destination
+        node of this view. See ``MultiMap.count()``.
+        """
+        return MultiMap.count(self._mapping, dst, src)
+
+    def out_degree(self, src: Node, distinct: bool = False) -> int:
+        """
+        Number of relationships from a specific source node of this view.
+        """
+        return self._mapping.in_degree(src, distinct)
+
+    def in_degree(self, dst: Node, distinct: bool = False) -> int:
+        """
+        Number of relationships to a specific target node of this view.
+        """
+        return self._mapping.out_degree(dst, distinct)
+
+    def hubs(self, k: int = 10, direction: str = "forward") -> List[Tuple[Node, int]]:
+        """
+        Retrieves the nodes of this view with the most relationships.
+        See ``MultiMap.hubs()``.
+        """
+        return self._mapping.hubs(k, _SIDES_REVERSED[_side(direction)])
+
+    def degree_histogram(self, direction: str = "forward") -> Dict[int, int]:
+        """
+        Counts the nodes of this view having each number of relationships.
+        See ``MultiMap.degree_histogram()``.
+        """
+        return self._mapping.degree_histogram(_SIDES_REVERSED[_side(direction)])
+
+    def fingerprint(self) -> int:
+        """
+        Order independent digest of the relationships in this view.
+        See ``MultiMap.fingerprint()``.
+        """
+        return self._mapping._fingerprint(1)
+
+    def size(self, distinct: bool = False) -> int:
+        """
+        Number of relationships in this view.
+        """
+        return self._mapping.size(distinct)
+
+    def inverse(self, copy: bool = True, view: bool = False) -> MultiMap:
+        """
+        Reverses this view back to its original direction. Yields a new
+        map when copying or the viewed map itself otherwise.
+        """
+        return self._mapping.copy() if copy and not view else self._mapping
+
+    def copy(self) -> MultiMap:
+        """
+        Materializes this view as a new & independent mapping.
+        """
+        return self._mapping.inverse(copy=True)
+
+    # visually represent state of this view.
+    def __repr__(self) -> str:
+        return str(list(self))
+
+    # number & frequency of relationships match another view or map
+    def __eq__(self, other) -> bool:
+        if isinstance(other, InverseView):
+            return self._mapping == other._mapping
+        return \
+            isinstance(other, MultiMap) and \
+            self._mapping._backward_hash == other._forward_hash and \
+            self._mapping._sources == other._targets and \
+            self._mapping._targets == other._sources
+
+    # identify if specific source to destination mapping exists.
+    def __contains__(self, item: Relation) -> bool:
+        return self.count(*item) > 0
+
+    __len__ = size          # cardinality
+    __iter__ = items        # iterable like list
+    __getitem__ = source    # syntactic sugar idexable like list
+    __call__ = source       # syntactic sugar callable like function
+
+
+# Accessors to either direction of a map's index.
+_SOURCES = attrgetter('_sources')
+_TARGETS = attrgetter('_targets')
+
+
+class NodesView(Set):
+    """
+    Live readonly set like view of the distinct source or target nodes
+    of a ``MultiMap``. Reflects subsequent modifications of the map
+    without copying any of its nodes.
+    """
+
+    def __init__(self, mapping: MultiMap, index: Callable[[MultiMap], dict]):
+        self._mapping = mapping
+        self._index = index
+        return
+
+    def __len__(self) -> int:
+        return len(self._index(self._mapping))
+
+    def __iter__(self) -> Iterator[Node]:
+        return iter(self._index(self._mapping))
+
+    def __contains__(self, node: Node) -> bool:
+        return node in self._index(self._mapping)
+
+    # visually represent state of this view.
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({list(self)})"
+
+    # set operations on views yield regular sets.
+    @classmethod
+    def _from_iterable(cls, items: Iterable[Node]) -> set:
+        return set(items)
+
+
+class NeighboursView(Collection):
+    """
+    Live readonly view of the (possibly duplicated) nodes related to a
+    specific source or target node of a ``MultiMap``. Iteration expands
+    duplicates like a list would while lookups never copy the map.
+    """
+
+    def __init__(self, mapping: MultiMap, index: Callable[[MultiMap], dict], node: Node):
+        self._mapping = mapping
+        self._index = index
+        self._node = node
+        return
+
+    def counts(self) -> Mapping[Node, int]:
+        """
+        Retrieves a readonly mapping of each distinct related node to
+        its frequency.
+        """
+        return MappingProxyType(self._counter())
+
+    def distinct(self) -> Iterable[Node]:
+        """
+        Retrieves the distinct related nodes without their duplicates.
+        """
+        return self._counter().keys()
+
+    def to_list(self) -> List[Node]:
+        """
+        Snapshots the (possibly duplicated) related nodes as a new list.
+        """
+        return list(self)
+
+    # number of related nodes including duplicates.
+    def __len__(self) -> int:
+        degree = self._mapping.out_degree if self._index is _SOURCES else self._mapping.in_degree
+        return degree(self._node)
+
+    # whether any node is related.
+    def __bool__(self) -> bool:
+        return bool(self._counter())
+
+    # expanded related nodes like a list.
+    def __iter__(self) -> Iterator[Node]:
+        return (
+            node
+            for node, freq in self._counter().items()
+            for _ in range(freq)
+        )
+
+    # identify if specific node is related.
+    def __contains__(self, node: Node) -> bool:
+        return node in self._counter()
+
+    # same related nodes & frequencies as another view or sequence.
+    def __eq__(self, other) -> bool:
+        if isinstance(other, NeighboursView):
+            return self._counter() == other._counter()
+        return self.to_list() == other
+
+    # visually represent state of this view.
+    def __repr__(self) -> str:
+        return str(self.to_list())
+
+    # frequencies of related nodes or empty if unknown.
+    def _counter(self) -> Mapping[Node, int]:
+        return self._index(self._mapping).get(self._node, _EMPTY)
+
+
+class _Sampler:
+    """
+    Random access collection of distinct keys with positive integer weights
+    for uniform draws in constant time as well as weighted draws & updates
+    in logarithmic time. Weights are kept in a Fenwick tree of prefix sums
+    & removed keys are swapped with the last one to keep slots contiguous.
+    """
+
+    def __init__(self, items: Iterable[Tuple[Node, int]] = ()):
+        self._keys = []         # key of each slot
+        self._weights = []      # weight of each slot
+        self._slots = dict()    # slot of each key
+        for key, weight in items:
+            self._slots[key] = len(self._keys)
+            self._keys.append(key)
+            self._weights.append(weight)
+        self._tree = [0, *self._weights]    # 1-based partial sums of weights
+        for i in range(1, len(self._tree)):
+            j = i + (i & -i)
+            if j < len(self._tree):
+                self._tree[j] += self._tree[i]
+        self._total = sum(self._weights)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def update(self, key: Node, delta: int) -> None:
+        slot = self._slots.get(key)
+        if slot is None:
+            slot = self._slots[key] = len(self._keys)
+            self._keys.append(key)
+            self._weights.append(0)
+            i = slot + 1
+            self._tree.append(self._prefix(i - 1) - self._prefix(i - (i & -i)))
+        self._weights[slot] += delta
+        self._total += delta
+        self._add(slot + 1, delta)
+        if self._weights[slot] <= 0:
+            self._pop(slot)
+
+    def choice(self, rng: random.Random) -> Node:
+        return rng.choice(self._keys)
+
+    def weighted_choice(self, rng: random.Random) -> Node:
+        if not self._keys:
+            raise IndexError("Cannot choose from an empty sequence")
+        remaining = rng.randrange(self._total)
+        pos = 0
+        step = 1 << (len(self._keys).bit_length() - 1)
+        while step:
+            if pos + step < len(self._tree) and self._tree[pos + step] <= remaining:
+                pos += step
+                remaining -= self._tree[pos]
+            step >>= 1
+        return self._keys[pos]
+
+    # shift the weight of a 1-based position & the partial sums covering it.
+    def _add(self, i: int, delta: int) -> None:
+        while i < len(self._tree):
+            self._tree[i] += delta
+            i += i & -i
+
+    # total weight of the first i slots.
+    def _prefix(self, i: int) -> int:
+        total = 0
+        while i > 0:
+            total += self._tree[i]
+            i -= i & -i
+        return total
+
+    # remove an empty slot by moving the last key into it.
+    def _pop(self, slot: int) -> None:
+        del self._slots[self._keys[slot]]
+        last = len(self._keys) - 1
+        if slot != last:
+            key, weight = self._keys[last], self._weights[last]
+            self._add(slot + 1, weight - self._weights[slot])
+            self._keys[slot], self._weights[slot] = key, weight
+            self._slots[key] = slot
+        self._keys.pop()
+        self._weights.pop()
+        self._tree.pop()
+
+
+# Sampler of nodes without any relationships.
+_NO_SAMPLES = _Sampler()
+
+
+# Directions of relationships by index side.
+_SIDES = {"forward": 0, "backward": 1}
+_SIDES_REVERSED = ("backward", "forward")
+
+
+# index side of a direction of relationships.
+def _side(direction: str) -> int:
+    if direction not in _SIDES:
+        raise ValueError(f"Invalid direction: {direction}")
+    return _SIDES[direction]
+
+
+# Bit mask of unsigned 64 bit hashes.
+_MASK = (1 << 64) - 1
+
+# Salt of the builtin hashes of this process such that hashes computed by
+# processes with other salts are never reused.
+_SEED = hash(__name__)
+
+
+# Type tagged encoding of a node such that equal nodes encode equally
+# across processes unlike their salted builtin hashes.
+def _canonical(node: Node) -> bytes:
+    if isinstance(node, str):
+        return b's' + node.encode('utf-8', 'surrogatepass')
+    if isinstance(node, numbers.Integral):
+        return b'i%d' % int(node)
+    if node is None:
+        return b'N'
+    if isinstance(node, (numbers.Real, Decimal)) and float(node) == node:
+        node = float(node)
+        return b'i%d' % node if node.is_integer() else b'f' + node.hex().encode()
+    if isinstance(node, bytes):
+        return b'b' + node
+    if isinstance(node, tuple):
+        parts = [_canonical(part) for part in node]
+        return b't' + b''.join(struct.pack('=Q', len(part)) + part for part in parts)
+    raise TypeError(f"Unsupported node type: {type(node)}")
+
+
+# stable & well mixed 64 bit hash of a relation falling back to the
+# builtin hash of nodes without a canonical encoding.
+def _digest(src: Node, dst: Node) -> int:
+    try:
+        src = _canonical(src)
+    except TypeError:
+        src = b'h%d' % hash(src)
+    try:
+        dst = _canonical(dst)
+    except TypeError:
+        dst = b'h%d' % hash(dst)
+    digest = blake2b(b'%d:' % len(src) + src + dst, digest_size=8).digest()
+    return int.from_bytes(digest, 'little')
+
+
+# Empty counter bypassing the costly generic initialization of ``Counter()``.
+_new_counter = partial(Counter.__new__, Counter)
+
+
+# parallel source, target & frequency lists of the relations of an index.
+def _flatten(index: Mapping[Node, Mapping[Node, int]]) -> Tuple[List[Node], List[Node], List[int]]:
+    return (
+        list(chain.from_iterable(map(repeat, index, map(len, index.values())))),
+        list(chain.from_iterable(index.values())),
+        list(chain.from_iterable(map(dict.values, index.values()))),
+    )
+
+
+# frequencies of parallel source & target lists grouped by source.
+def _group(srcs: Iterable[Node], dsts: Iterable[Node], freqs: Iterable[int]) -> Dict[Node, dict]:
+    index = defaultdict(dict)
+    deque(map(setitem, map(index.__getitem__, srcs), dsts, freqs), maxlen=0)
+    return dict(index)
+
+
+# order independent hash of parallel source, target & frequency lists.
+def _hash(srcs: Iterable[Node], dsts: Iterable[Node], freqs: Iterable[int]) -> int:
+    return sum(map(mul, freqs, map(hash, zip(srcs, dsts)))) & _MASK
+
+
+# number of relations of each node of an index.
+def _weigh(index: Mapping[Node, Mapping[Node, int]]) -> Dict[Node, int]:
+    return dict(zip(index, map(sum, map(dict.values, index.values()))))
+
+
+# index of nodes to counters of known positive frequencies built about as
+# cheaply as plain dicts.
+def _counters(nodes: Iterable[Node], freqs: Iterable[Mapping[Node, int]]) -> Dict[Node, Counter]:
+    counters = [_new_counter() for _ in nodes]
+    deque(map(dict.update, counters, freqs), maxlen=0)
+    return dict(zip(nodes, counters))
+
+
+# Frequencies of unrelated nodes.
+_EMPTY = MappingProxyType(dict())
+
+
+# Column separators of delimited file formats.
+_DELIMITERS = {"csv": ',', "tsv": '\t'}
+
+# Supported file formats.
+_FORMATS = {*_DELIMITERS, "jsonl"}
+
+
+# file format from its possibly compressed extension.
+def _infer_format(path: str) -> str:
+    name = path[:-len('.gz')] if path.endswith('.gz') else path
+    fmt = os.path.splitext(name)[1].lstrip('.').lower()
+    fmt = "jsonl" if fmt in {"json", "ndjson"} else fmt
+    if fmt not in _FORMATS:
+        raise ValueError(f"Unknown file format: {path}")
+    return fmt
+
+
+# open a text file with large buffers that may be gzip compressed. readable
+# files are detected as compressed by their content & writable ones by name.
+def _open(path: str, mode: str, encoding: str):
+    if 'r' in mode:
+        with open(path, 'rb') as file:
+            compressed = file.read(2) == b'\x1f\x8b'
+    else:
+        compressed = path.endswith('.gz')
+    if compressed:
+        return gzip.open(path, mode, encoding=encoding, newline='')
+    return open(path, mode, buffering=1 << 20, encoding=encoding, newline='')
+
+
+# json arrays as (nested) tuples so that nodes written as tuples stay hashable.
+def _tuples(value):
+    if isinstance(value, list):
+        return tuple(map(_tuples, value))
+    return value
+
+
+# source, destination & frequency of each non blank row of a file.
+def _read_rows(file, fmt: str) -> Iterator[Tuple[Node, Node, int]]:
+    if fmt == "jsonl":
+        rows = (list(map(_tuples, json.loads(line))) for line in file if line.strip())
+    elif fmt in _DELIMITERS:
+        rows = (row for row in csv.reader(file, delimiter=_DELIMITERS[fmt]) if row)
+    else:
+        raise ValueError(f"Unknown file format: {fmt}")
+
+    for row in rows:
+        if len(row) == 2:
+            yield row[0], row[1], 1
+        elif len(row) == 3:
+            yield row[0], row[1], int(row[2])
+        else:
+            raise ValueError(f"Invalid relationship row: {row!r}")
@@ -0,0 +1,191 @@
+#!usr/bin/env python
+
+# External libraries
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain, repeat
+from tempfile import TemporaryDirectory
+from typing import Dict, Iterator, List, Tuple
+from pyutils.multimap import MultiMap, Node, Totals, _SEED, _MASK, _counters, _flatten, _hash, _weigh
+import os
+import pickle
+import zlib
+
+# Frequencies of the relationships found in a chunk of a file grouped by
+# either their source or target nodes.
+Partial = Dict[Node, Dict[Node, int]]
+
+# Forward & backward frequencies of a shard along with the weights of
+# their nodes, the hash seed of their totals & their totals.
+Shard = Tuple[Partial, Partial, Dict[Node, int], Dict[Node, int], int, Totals]
+
+
+class MultiMapBuilder:
+    """
+    Builds a ``MultiMap`` from a large delimited file of relationships
+    across a pool of processes. The file is split into byte ranges that
+    are parsed & tallied in parallel into shards of forward frequencies
+    by a stable hash of their source nodes & shards of backward
+    frequencies by a stable hash of their target nodes. Shards are
+    spilled to temporary files & streamed to processes merging each one
+    across byte ranges in parallel along with the weights & hashes of
+    their nodes & relations. Since shards are disjoint, the resulting
+    map only concatenates them.
+
+    Each line holds a source & destination node along with an optional
+    frequency column, such that duplicated relationships may either be
+    repeated or grouped onto a single line. Lines end with ``\\n`` or
+    ``\\r\\n`` so the encoding must be ASCII compatible. Nodes are read
+    as strings.
+    """
+
+    def __init__(self, workers: int = None, delimiter: str = '\t', encoding: str = 'utf-8', chunk_size: int = 1 << 26):
+        """
+        Constructor to instantiate a new ``MultiMapBuilder``.
+
+        Args:
+            workers: Number of processes to parse with or all cpu cores if ``None``.
+            delimiter: Separator of the columns of each line.
+            encoding: Text encoding of the file.
+            chunk_size: Approximate number of bytes parsed by a process at a time.
+        """
+        if chunk_size < 1:
+            raise ValueError(f"Invalid chunk size: {chunk_size}")
+        self.workers = workers or os.cpu_count() or 1
+        self.delimiter = delimiter
+        self.encoding = encoding
+        self.chunk_size = chunk_size
+        return
+
+    def build(self, path: str, snapshot: str = None) -> MultiMap:
+        """
+        Parses a file of relationships into a new map.
+
+        Args:
+            path: Location of the file to parse.
+            snapshot: Optional location to also save the map to as per ``MultiMap.save()``.
+
+        Returns:
+            result: A new mapping of all relationships in the file.
+        """
+        with TemporaryDirectory() as spill:
+            starts, ends = tuple(zip(*self._chunks(path))) or ((), ())
+            tasks = (repeat(path), starts, ends, repeat(self.delimiter), repeat(self.encoding), repeat(self.workers), repeat(spill))
+            reductions = (repeat(spill), range(self.workers), repeat(starts))
+            if self.workers == 1 or len(starts) <= 1:
+                list(map(_parse, *tasks))
+                result = self._concatenate(map(_reduce, *reductions))
+            else:
+                with ProcessPoolExecutor(max_workers=self.workers) as pool:
+                    list(pool.map(_parse, *tasks))
+                    result = self._concatenate(pool.map(_reduce, *reductions))
+
+        if snapshot:
+            result.save(snapshot)
+        return result
+
+    # byte ranges splitting a file into roughly equal chunks for the workers.
+    def _chunks(self, path: str) -> List[Tuple[int, int]]:
+        size = os.path.getsize(path)
+        n = max(self.workers, -(-size // self.chunk_size))
+        bounds = sorted({size * i // n for i in range(n + 1)})
+        return list(zip(bounds, bounds[1:]))
+
+    # map adopting disjoint shards as they are reduced, rehashing those
+    # hashed with another seed by another process.
+    @staticmethod
+    def _concatenate(shards: Iterator[Shard]) -> MultiMap:
+        sources, targets, weights, totals = dict(), dict(), (dict(), dict()), (0, 0, 0, 0)
+        for forward, backward, forward_weights, backward_weights, seed, shard_totals in shards:
+            if seed != _SEED:
+                shard_totals = (*shard_totals[:2], _hash(*_flatten(forward)), _hash(*_flatten(backward)))
+            sources.update(forward)
+            targets.update(backward)
+            weights[0].update(forward_weights)
+            weights[1].update(backward_weights)
+            totals = tuple(total + shard_total for total, shard_total in zip(totals, shard_totals))
+
+        result = MultiMap()
+        result._sources = _counters(sources, sources.values())
+        return result._assemble(
+            _counters(targets, targets.values()),
+            weights,
+            (*totals[:2], totals[2] & _MASK, totals[3] & _MASK),
+        )
+
+
+# parse & tally relationships of the lines starting within a byte range of a
+# file into shards of source & target nodes by stable hash spilled to files.
+def _parse(path: str, start: int, end: int, delimiter: str, encoding: str, shards: int, spill: str) -> None:
+    forward = [dict() for _ in range(shards)]
+    backward = [dict() for _ in range(shards)]
+    with open(path, 'rb') as file:
+        if start > 0:
+            file.seek(start - 1)
+            file.readline()     # previous chunk owns the line spanning start
+        data = file.read(max(end - file.tell(), 0))
+        if data and not data.endswith(b'\n'):
+            data += file.readline()     # this chunk owns the line spanning end
+
+    separator = delimiter.encode(encoding)
+    for line, freq in Counter(data.split(b'\n')).items():
+        if line.endswith(b'\r'):
+            line = line[:-1]
+        cols = line.split(separator)
+        if len(cols) == 3:
+            freq *= int(cols.pop())
+        if len(cols) != 2:
+            if line.strip():
+                raise ValueError(f"Invalid relationship line: {line.decode(encoding)!r}")
+            continue
+        src, dst = cols
+        src_shard, dst_shard = zlib.crc32(src) % shards, zlib.crc32(dst) % shards
+        src, dst = src.decode(encoding), dst.decode(encoding)
+        freqs = forward[src_shard].setdefault(src, dict())
+        freqs[dst] = freqs.get(dst, 0) + freq
+        freqs = backward[dst_shard].setdefault(dst, dict())
+        freqs[src] = freqs.get(src, 0) + freq
+
+    for shard, partials in enumerate(zip(forward, backward)):
+        with open(os.path.join(spill, f"{start}-{shard}"), 'wb') as file:
+            pickle.dump(partials, file, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+# merge a shard across the spilled byte ranges of a file one at a time
+# along with the weights & totals of its nodes & relations.
+def _reduce(spill: str, shard: int, starts: Tuple[int, ...]) -> Shard:
+    forward, backward = dict(), dict()
+    for start in starts:
+        path = os.path.join(spill, f"{start}-{shard}")
+        with open(path, 'rb') as file:
+            partials = pickle.load(file)
+        os.remove(path)
+        for index, partial in zip((forward, backward), partials):
+            _merge(index, partial)
+    forward, backward = _positive(forward), _positive(backward)
+
+    srcs, dsts, freqs = _flatten(forward)
+    totals = (sum(freqs), len(freqs), _hash(srcs, dsts, freqs), _hash(*_flatten(backward)))
+    return forward, backward, _weigh(forward), _weigh(backward), _SEED, totals
+
+
+# sum the frequencies of a partial into an index, adopting new nodes as is.
+def _merge(index: Partial, partial: Partial) -> None:
+    for node, freqs in partial.items():
+        counts = index.get(node)
+        if counts is None:
+            index[node] = freqs
+            continue
+        for neighbour, freq in freqs.items():
+            counts[neighbour] = counts.get(neighbour, 0) + freq
+
+
+# index without relations of non positive frequencies, if any.
+def _positive(index: Partial) -> Partial:
+    if min(chain.from_iterable(map(dict.values, index.values())), default=1) > 0:
+        return index
+    index = {
+        node: {neighbour: freq for neighbour, freq in freqs.items() if freq > 0}
+        for node, freqs in index.items()
+    }
+    return {node: freqs for node, freqs in index.items() if freqs}
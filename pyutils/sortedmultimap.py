@@ -0,0 +1,232 @@
+#!usr/bin/env python
+
+# External libraries
+from bisect import bisect_left, bisect_right, insort
+from itertools import chain, takewhile
+from typing import Iterable, Iterator, Tuple
+from pyutils.multimap import MultiMap, Node, Relation, Totals, _side
+
+
+class SortedMultiMap(MultiMap):
+    """
+    ``MultiMap`` that also keeps its distinct source & target nodes in
+    sorted order for range scans, prefix queries & ordered iteration in
+    logarithmic time plus the number of nodes retrieved. The ordered
+    indices are only updated as nodes are added or removed rather than
+    re-sorted, so all nodes of a same direction must be mutually
+    comparable.
+    """
+
+    def __init__(self, items: Iterable[Relation] = None):
+        """
+        Constructor to instantiate a new ``SortedMultiMap``.
+
+        Args:
+            items: Optional collection of source & destination nodes to map.
+        """
+        self._ordered = (_SortedKeys(), _SortedKeys())  # sorted source & target nodes
+        self._ordered_owned = True  # whether ordered indices are unshared with copies
+        super().__init__(items)
+        return
+
+    def items(self, with_counts: bool = False) -> Iterable[Relation]:
+        """
+        Retrieves the relations in this map as per ``MultiMap.items()`` by
+        increasing source nodes. Relations of a same source node are in
+        insertion order.
+        """
+        if with_counts:
+            return (
+                (src, dst, freq)
+                for src in self._ordered[0]
+                for dst, freq in self._sources[src].items()
+            )
+        return (
+            (src, dst)
+            for src in self._ordered[0]
+            for dst, freq in self._sources[src].items()
+            for _ in range(freq)
+        )
+
+    def irange(self, lo: Node = None, hi: Node = None, inclusive: Tuple[bool, bool] = (True, True), reverse: bool = False, direction: str = "forward") -> Iterator[Node]:
+        """
+        Retrieves the distinct nodes within a range in sorted order.
+
+        Args:
+            lo: Lower bound of the range or unbounded if ``None``.
+            hi: Upper bound of the range or unbounded if ``None``.
+            inclusive: Whether the lower & upper bounds are part of the range.
+            reverse: To retrieve nodes by decreasing rather than increasing order.
+            direction: To range over ``"forward"`` source nodes or
+                ``"backward"`` target nodes.
+        """
+        return self._ordered[_side(direction)].irange(lo, hi, inclusive, reverse)
+
+    def prefix(self, prefix: str, direction: str = "forward") -> Iterator[Node]:
+        """
+        Retrieves the distinct string (or bytes) nodes starting with a
+        prefix in sorted order.
+
+        Args:
+            prefix: Leading characters of the nodes to retrieve.
+            direction: To look up ``"forward"`` source nodes or
+                ``"backward"`` target nodes.
+        """
+        return takewhile(
+            lambda node: node.startswith(prefix),
+            self._ordered[_side(direction)].irange(prefix),
+        )
+
+    def inverse(self, copy: bool = True, view: bool = False) -> MultiMap:
+        """
+        Reverses source & destination direction mapping of all relationships
+        as per ``MultiMap.inverse()``.
+        """
+        result = super().inverse(copy, view)
+        if result is self:
+            self._ordered = self._ordered[::-1]
+        return result
+
+    def clear(self) -> 'SortedMultiMap':
+        """
+        Inplace deletes all relationships in this map.
+
+        Returns:
+            result: Modified instance of this map.
+        """
+        super().clear()
+        self._ordered = (_SortedKeys(), _SortedKeys())
+        self._ordered_owned = True
+        return self
+
+    def copy(self) -> 'SortedMultiMap':
+        """
+        Creates a new but shallow clone of this mapping in constant time
+        as per ``MultiMap.copy()``. Ordered indices are also copied on write.
+        """
+        clone = super().copy()
+        self._ordered_owned = clone._ordered_owned = False
+        return clone
+
+    __iter__ = items        # iterable like list
+
+    # index nodes seen for the first time before linking them so that
+    # incomparable nodes are rejected without modifying this map.
+    def _link(self, src: Node, dst: Node, n: int = 1) -> None:
+        new_src, new_dst = src not in self._sources, dst not in self._targets
+        if new_src or new_dst:
+            sources, targets = self._own_ordered()
+            if new_src:
+                sources.add(src)
+            if new_dst:
+                try:
+                    targets.add(dst)
+                except TypeError:
+                    if new_src:
+                        sources.remove(src)
+                    raise
+        super()._link(src, dst, n)
+
+    # unindex nodes without relationships anymore.
+    def _unlink(self, src: Node, dst: Node, n: int = 1) -> int:
+        n = super()._unlink(src, dst, n)
+        gone_src, gone_dst = src not in self._sources, dst not in self._targets
+        if n and (gone_src or gone_dst):
+            sources, targets = self._own_ordered()
+            if gone_src:
+                sources.remove(src)
+            if gone_dst:
+                targets.remove(dst)
+        return n
+
+    # bulk rebuilt maps sort all their nodes at once.
+    def _mirror(self, totals: Totals = None) -> 'SortedMultiMap':
+        super()._mirror(totals)
+        self._ordered = (_SortedKeys(self._sources), _SortedKeys(self._targets))
+        self._ordered_owned = True
+        return self
+
+    # ordered indices safe to modify by copying them if shared.
+    def _own_ordered(self) -> Tuple['_SortedKeys', '_SortedKeys']:
+        if not self._ordered_owned:
+            self._ordered = tuple(ordered.copy() for ordered in self._ordered)
+            self._ordered_owned = True
+        return self._ordered
+
+
+class _SortedKeys:
+    """
+    Sorted list of distinct keys split into bounded chunks so that
+    insertions & deletions only shift the keys of a single chunk.
+    """
+
+    _LOAD = 512     # typical number of keys per chunk
+
+    def __init__(self, keys: Iterable[Node] = ()):
+        keys = sorted(keys)
+        self._chunks = [keys[i:i + self._LOAD] for i in range(0, len(keys), self._LOAD)]
+        self._maxes = [chunk[-1] for chunk in self._chunks]
+
+    def __len__(self) -> int:
+        return sum(map(len, self._chunks))
+
+    def __iter__(self) -> Iterator[Node]:
+        return chain.from_iterable(list(self._chunks))
+
+    def add(self, key: Node) -> None:
+        if not self._maxes:
+            self._chunks.append([key])
+            self._maxes.append(key)
+            return
+        i = bisect_left(self._maxes, key)
+        if i == len(self._maxes):
+            i -= 1
+            self._chunks[i].append(key)
+            self._maxes[i] = key
+        else:
+            insort(self._chunks[i], key)
+        chunk = self._chunks[i]
+        if len(chunk) > 2 * self._LOAD:
+            self._chunks.insert(i + 1, chunk[self._LOAD:])
+            del chunk[self._LOAD:]
+            self._maxes.insert(i, chunk[-1])
+
+    def remove(self, key: Node) -> None:
+        i = bisect_left(self._maxes, key)
+        chunk = self._chunks[i]
+        del chunk[bisect_left(chunk, key)]
+        if not chunk:
+            del self._chunks[i]
+            del self._maxes[i]
+        else:
+            self._maxes[i] = chunk[-1]
+
+    def irange(self, lo: Node = None, hi: Node = None, inclusive: Tuple[bool, bool] = (True, True), reverse: bool = False) -> Iterator[Node]:
+        i0, j0 = (0, 0) if lo is None else self._position(lo, not inclusive[0])
+        i1, j1 = (len(self._chunks), 0) if hi is None else self._position(hi, inclusive[1])
+        if (i0, j0) >= (i1, j1):
+            return iter(())
+        slices = [(i, j0 if i == i0 else 0, j1 if i == i1 else None) for i in range(i0, min(i1 + 1, len(self._chunks)))]
+        if reverse:
+            return chain.from_iterable(
+                reversed(self._chunks[i][start:stop])
+                for i, start, stop in reversed(slices)
+            )
+        return chain.from_iterable(
+            self._chunks[i][start:stop]
+            for i, start, stop in slices
+        )
+
+    def copy(self) -> '_SortedKeys':
+        clone = _SortedKeys()
+        clone._chunks = [list(chunk) for chunk in self._chunks]
+        clone._maxes = list(self._maxes)
+        return clone
+
+    # chunk & offset of the leftmost or rightmost insertion point of a key.
+    def _position(self, key: Node, right: bool) -> Tuple[int, int]:
+        bisect = bisect_right if right else bisect_left
+        i = bisect(self._maxes, key)
+        if i == len(self._maxes):
+            return i, 0
+        return i, bisect(self._chunks[i], key)
@@ -1,6 +1,9 @@
 #!usr/bin/env python
 from dataclasses import dataclass
-from typing import Optional
+from operator import attrgetter
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
+import math
+import random
 
 
 # ABOUT: immutable class like range() but supports overlap relationships,
@@ -101,3 +104,211 @@ class Span:
     # this not overlapping other
     def disjoint(self, other) -> bool:
         return not self.overlaps(other)
+
+
+# ABOUT: mutable set of spans indexed by a randomized balanced search tree
+# (treap) ordered by start & augmented with the extreme ends of each
+# subtree, so that overlap, stabbing & containment queries prune every
+# subtree that can not match rather than scanning all spans. Unbounded
+# starts & ends sort before & after all points.
+class SpanIndex:
+
+    def __init__(self, spans: Iterable[Span] = ()):
+        self._spans = set(spans)
+        nodes = sorted(map(_SpanNode, self._spans), key=attrgetter('key'))
+        self._root = _build(nodes)
+
+    # number of distinct spans
+    def __len__(self) -> int:
+        return len(self._spans)
+
+    # spans by increasing start then end
+    def __iter__(self) -> Iterator[Span]:
+        result = []
+        _walk(self._root, lambda node: True, result)
+        return iter(result)
+
+    # span is indexed
+    def __contains__(self, span: Span) -> bool:
+        return span in self._spans
+
+    # index a span if not already
+    def add(self, span: Span) -> 'SpanIndex':
+        if span not in self._spans:
+            self._spans.add(span)
+            self._root = _insert(self._root, _SpanNode(span))
+        return self
+
+    # unindex a span if indexed
+    def discard(self, span: Span) -> 'SpanIndex':
+        if span in self._spans:
+            self._spans.remove(span)
+            self._root = _delete(self._root, _SpanNode(span).key)
+        return self
+
+    # unindex an indexed span
+    def remove(self, span: Span) -> 'SpanIndex':
+        if span not in self._spans:
+            raise KeyError(span)
+        return self.discard(span)
+
+    # spans sharing at least one point with a query span including when
+    # either contains the other (unlike Span.overlaps)
+    def overlapping(self, query: Span) -> List[Span]:
+        lo, hi = _bounds(query)
+        result = []
+        _overlapping(self._root, lo, hi, result)
+        return result
+
+    # spans including a specific point
+    def containing(self, point: int) -> List[Span]:
+        return self.overlapping(Span(point, point))
+
+    # spans fully contained in a query span
+    def within(self, query: Span) -> List[Span]:
+        lo, hi = _bounds(query)
+        result = []
+        _within(self._root, lo, hi, result)
+        return result
+
+
+# tree node of an indexed span & the extreme ends within its subtree
+class _SpanNode:
+    __slots__ = ('span', 'key', 'priority', 'left', 'right', 'max_end', 'min_end')
+
+    def __init__(self, span: Span, priority: float = None):
+        self.span = span
+        self.key = _bounds(span)
+        self.priority = random.random() if priority is None else priority
+        self.left = self.right = None
+        self.max_end = self.min_end = self.key[1]
+
+    # refresh extreme ends from children
+    def update(self) -> '_SpanNode':
+        self.max_end = self.min_end = self.key[1]
+        for child in (self.left, self.right):
+            if child is not None:
+                self.max_end = max(self.max_end, child.max_end)
+                self.min_end = min(self.min_end, child.min_end)
+        return self
+
+
+# comparable start & end of a span where unbounded values are infinite
+def _bounds(span: Span) -> Tuple[float, float]:
+    return (
+        -math.inf if span.start is None else span.start,
+        math.inf if span.end is None else span.end,
+    )
+
+
+# balanced tree of sorted nodes with decreasing priorities by depth
+def _build(nodes: List[_SpanNode]) -> Optional[_SpanNode]:
+    root = _balanced(nodes, 0, len(nodes))
+    levels = _levels(root)
+    for node, priority in zip(levels, sorted((random.random() for _ in nodes), reverse=True)):
+        node.priority = priority
+    for node in reversed(levels):
+        node.update()
+    return root
+
+
+# balanced tree of a range of sorted nodes
+def _balanced(nodes: List[_SpanNode], lo: int, hi: int) -> Optional[_SpanNode]:
+    if lo >= hi:
+        return None
+    mid = (lo + hi) // 2
+    node = nodes[mid]
+    node.left = _balanced(nodes, lo, mid)
+    node.right = _balanced(nodes, mid + 1, hi)
+    return node
+
+
+# nodes of a tree in breadth first order
+def _levels(root: Optional[_SpanNode]) -> List[_SpanNode]:
+    result = [root] if root else []
+    for node in result:
+        result.extend(child for child in (node.left, node.right) if child)
+    return result
+
+
+# tree with a new node rotated up by priority
+def _insert(node: Optional[_SpanNode], new: _SpanNode) -> _SpanNode:
+    if node is None:
+        return new
+    if new.key < node.key:
+        node.left = _insert(node.left, new)
+        if node.left.priority > node.priority:
+            node = _rotate_right(node)
+    else:
+        node.right = _insert(node.right, new)
+        if node.right.priority > node.priority:
+            node = _rotate_left(node)
+    return node.update()
+
+
+# tree without the node of a key
+def _delete(node: Optional[_SpanNode], key: Tuple[float, float]) -> Optional[_SpanNode]:
+    if key < node.key:
+        node.left = _delete(node.left, key)
+    elif key > node.key:
+        node.right = _delete(node.right, key)
+    else:
+        return _merge(node.left, node.right)
+    return node.update()
+
+
+# tree joining two trees where all keys of the first precede the second
+def _merge(left: Optional[_SpanNode], right: Optional[_SpanNode]) -> Optional[_SpanNode]:
+    if left is None or right is None:
+        return left or right
+    if left.priority > right.priority:
+        left.right = _merge(left.right, right)
+        return left.update()
+    right.left = _merge(left, right.left)
+    return right.update()
+
+
+def _rotate_right(node: _SpanNode) -> _SpanNode:
+    child = node.left
+    node.left, child.right = child.right, node
+    node.update()
+    return child
+
+
+def _rotate_left(node: _SpanNode) -> _SpanNode:
+    child = node.right
+    node.right, child.left = child.left, node
+    node.update()
+    return child
+
+
+# in order spans of a tree satisfying a predicate
+def _walk(node: Optional[_SpanNode], predicate: Callable[[_SpanNode], bool], result: List[Span]) -> None:
+    if node is not None:
+        _walk(node.left, predicate, result)
+        if predicate(node):
+            result.append(node.span)
+        _walk(node.right, predicate, result)
+
+
+# in order spans starting at most at hi & ending at least at lo
+def _overlapping(node: Optional[_SpanNode], lo: float, hi: float, result: List[Span]) -> None:
+    if node is None or node.max_end < lo:
+        return
+    _overlapping(node.left, lo, hi, result)
+    if node.key[0] <= hi:
+        if node.key[1] >= lo:
+            result.append(node.span)
+        _overlapping(node.right, lo, hi, result)
+
+
+# in order spans starting at least at lo & ending at most at hi
+def _within(node: Optional[_SpanNode], lo: float, hi: float, result: List[Span]) -> None:
+    if node is None or node.min_end > hi:
+        return
+    if node.key[0] >= lo:
+        _within(node.left, lo, hi, result)
+        if node.key[1] <= hi:
+            result.append(node.span)
+    if node.key[0] <= hi:
+        _within(node.right, lo, hi, result)
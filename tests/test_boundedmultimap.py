@@ -0,0 +1,161 @@
+#!usr/bin/env python
+
+from pyutils.boundedmultimap import *
+from typing import Iterable
+import pickle
+import pytest
+import random
+
+
+# Invalid configurations should fail.
+@pytest.mark.unit
+def test__boundedmultimap_config00():
+    with pytest.raises(ValueError):
+        BoundedMultiMap(capacity=0)
+    with pytest.raises(ValueError):
+        BoundedMultiMap(unit="bytes")
+    with pytest.raises(ValueError):
+        BoundedMultiMap(policy="random")
+
+
+# Maps within capacity should behave like regular maps.
+@pytest.mark.unit
+def test__boundedmultimap_equality01(data):
+    relations = BoundedMultiMap(data)
+    assert relations == MultiMap(data) and MultiMap(data) == relations
+    assert relations == BoundedMultiMap(data, capacity=5)
+    assert relations.evictions == 0
+    assert relations.copy() == relations
+    assert pickle.loads(pickle.dumps(relations)) == relations
+
+
+# Least recently used source nodes should be evicted first.
+@pytest.mark.unit
+def test__boundedmultimap_lru01(data):
+    relations = BoundedMultiMap(data, capacity=3)
+    assert relations.domain == {3, None, 4} and relations.evictions == 2
+    assert relations.range == {'b', 'c', 'd', None}
+    assert relations[3] == ['b', 'c', 'd'] and relations[1] == []
+    relations.add(5, 'e')
+    assert relations.domain == {3, 4, 5} and relations.evictions == 3
+    assert relations.target('d') == [3] and relations.in_degree('d') == 1
+    assert (relations.hits, relations.misses) == (1, 1)
+
+
+# Least frequently used source nodes should be evicted first.
+@pytest.mark.unit
+def test__boundedmultimap_lfu01(data):
+    relations = BoundedMultiMap(data, capacity=3, policy="lfu")
+    for _ in range(3):
+        relations.source(None)
+    relations.source(4)
+    relations.add(5, 'e').add(6, 'f')
+    assert relations.domain == {None, 4, 6} and relations.evictions == 4
+    relations.remove(4, None)
+    relations.add(7, 'g').add(8, 'h')
+    assert relations.domain == {None, 7, 8}
+    assert relations.range == {'d', 'g', 'h'}
+
+
+# Capacity in relations should count duplicates & evict whole sources.
+@pytest.mark.unit
+def test__boundedmultimap_relations01(data):
+    relations = BoundedMultiMap(data, capacity=4, unit="relations")
+    assert len(relations) <= 4
+    relations.add(9, 'z', count=3)
+    assert relations.domain == {4, 9} and len(relations) == 4
+    relations.add(9, 'z', count=2)
+    assert len(relations) == 0 and relations.range == set()
+
+
+# Copies, inverses & clears should keep the cache consistent.
+@pytest.mark.unit
+def test__boundedmultimap_modify01(data):
+    relations = BoundedMultiMap(data, capacity=3)
+    clone = relations.copy().add(5, 'e')
+    assert relations.domain == {3, None, 4} and clone.domain == {None, 4, 5}
+    relations.inverse(copy=False)
+    assert len(relations.domain) == 3 and relations.evictions == 3
+    assert relations == BoundedMultiMap(relations.items(), capacity=3)
+    relations.clear().update(data)
+    assert relations.domain == {3, None, 4} and relations.evictions == 5
+
+
+# Every forward read should account for its source nodes unlike reads of inverse views.
+@pytest.mark.unit
+def test__boundedmultimap_access01(data):
+    relations = BoundedMultiMap(data, capacity=3)
+    inverse = relations.inverse(view=True)
+    assert inverse.target(3) == ['b', 'c', 'd'] and inverse.target_many([3], how="union") == {'b', 'c', 'd'}
+    assert inverse.count('b', 3) == 1 and ('b', 3) in inverse
+    assert inverse.sources_with_all([3]) == {'b', 'c', 'd'} and inverse.targets_with_any(['b']) == {3}
+    assert (relations.hits, relations.misses) == (0, 0)
+    relations.add(5, 'e')
+    assert relations.domain == {None, 4, 5}
+    assert relations.source_many([None, 1], how="flat") == ([0, 1, 1], ['d'])
+    assert (4, None) in relations and relations.count(MultiMap.UNDEFINED, 'e') == 1
+    assert relations.targets_with_all([5, 5, 7]) == set()
+    assert relations.sources_with_any(['d']) == {None}
+    assert (relations.hits, relations.misses) == (4, 2)
+    relations.add(6, 'f')
+    assert relations.domain == {None, 5, 6}
+
+
+# Merging a map into itself should double its relations before evicting.
+@pytest.mark.unit
+def test__boundedmultimap_merge01():
+    relations = BoundedMultiMap([(i, 'x') for i in range(4)], capacity=4, unit="relations")
+    relations += relations
+    assert relations.domain == {2, 3} and len(relations) == 4
+    relations.update(relations)
+    assert relations.domain == {3} and relations[3] == ['x'] * 4
+    assert relations.evictions == 3
+
+
+# Randomly churned caches should never exceed capacity & stay consistent.
+@pytest.mark.unit
+def test__boundedmultimap_churn01():
+    rnd = random.Random(0)
+    for policy in ("lru", "lfu"):
+        relations = BoundedMultiMap(capacity=20, policy=policy)
+        for _ in range(5_000):
+            src, dst = rnd.randrange(50), rnd.randrange(50)
+            op = rnd.random()
+            if op < 0.4:
+                relations.source(src)
+            elif op < 0.9:
+                relations.add(src, dst)
+            else:
+                relations.remove(src, MultiMap.UNDEFINED)
+            assert len(relations.domain) <= 20
+        assert relations == BoundedMultiMap(relations.items(), capacity=20)
+        assert MultiMap(relations.items()).inverse() == relations.inverse()
+        assert relations.hits and relations.misses and relations.evictions
+
+
+# Profile a cache of a skewed access pattern.
+@pytest.mark.stress
+@pytest.mark.benchmark(group="boundedmultimap-access")
+@pytest.mark.parametrize("policy", ["lru", "lfu"])
+def test__boundedmultimap_access00(benchmark, policy):
+    rnd = random.Random(0)
+    keys = [int(rnd.paretovariate(1)) % 10_000 for _ in range(20_000)]
+
+    def access():
+        relations = BoundedMultiMap(capacity=100, policy=policy)
+        for key in keys:
+            if not relations[key]:
+                relations.add(key, -key)
+        return relations
+    relations = benchmark(access)
+    benchmark.extra_info["hit_ratio"] = relations.hits / len(keys)
+    assert len(relations.domain) == 100
+
+
+# Sample test data with duplicate, many-to-many, mixed types & None values allowed.
+@pytest.fixture
+def data() -> Iterable[Relation]:
+    return [
+        (1, "a"), (2, "a"), (2, "c"), (2, "c"), (3, "b"), (3, "c"), (3, "d"),
+        (None, 'd'), (4, None)
+    ]
@@ -0,0 +1,165 @@
+#!usr/bin/env python
+
+from pyutils.concurrentmultimap import *
+import pytest
+import random
+import threading
+
+
+# Maps equal content of identical concurrent & regular maps.
+@pytest.mark.unit
+def test__concurrentmultimap_equality01(data):
+    relations = ConcurrentMultiMap(data, shards=3)
+    assert relations == ConcurrentMultiMap(data)
+    assert relations == MultiMap(data)
+    assert relations.to_multimap() == MultiMap(data)
+    assert relations.copy() == relations
+    assert relations != ConcurrentMultiMap(data[1:])
+
+
+# Invalid number of shards should fail.
+@pytest.mark.unit
+def test__concurrentmultimap_shards00():
+    with pytest.raises(ValueError):
+        ConcurrentMultiMap(shards=0)
+
+
+# Lookups should snapshot relationships in either direction.
+@pytest.mark.unit
+def test__concurrentmultimap_get01(data):
+    relations = ConcurrentMultiMap(data, shards=3)
+    assert relations(2) == relations[2] == ['a', 'c', 'c']
+    assert relations.target('c') == [2, 2, 3]
+    assert relations.source(99) == relations.target('z') == []
+    assert relations.domain == {1, 2, 3, 4, None}
+    assert relations.range == {'a', 'b', 'c', 'd', None}
+    assert sorted(relations, key=str) == sorted(data, key=str)
+    assert len(relations) == 9
+    assert relations.size(distinct=True) == 8
+
+
+# Check for existing & non existing items.
+@pytest.mark.unit
+def test__concurrentmultimap_membership01(data):
+    relations = ConcurrentMultiMap(data, shards=3)
+    assert (1, 'a') in relations
+    assert (None, 'd') in relations
+    assert (1, 'c') not in relations
+    assert (2, MultiMap.UNDEFINED) in relations
+    assert (MultiMap.UNDEFINED, 'z') not in relations
+
+
+# Modifications should behave like regular maps.
+@pytest.mark.unit
+def test__concurrentmultimap_modify01(data):
+    relations = ConcurrentMultiMap(data, shards=3)
+    relations.add(5, 'e').remove(2, 'c').remove(9, 'z')
+    assert relations == MultiMap(data).add(5, 'e').remove(2, 'c')
+    relations.remove(2, MultiMap.UNDEFINED).remove(MultiMap.UNDEFINED, 'd')
+    assert relations == MultiMap([(1, 'a'), (3, 'b'), (3, 'c'), (4, None), (5, 'e')])
+    relations.remove_many([(1, 'a'), (3, 'b'), (3, 'b')]).add(MultiMap.UNDEFINED, 'x')
+    assert relations == MultiMap([(3, 'c'), (4, None), (5, 'e')])
+    assert len(relations.clear()) == 0
+    assert relations.domain == relations.range == set()
+
+
+# Concurrent writers should leave both directions consistent.
+@pytest.mark.stress
+def test__concurrentmultimap_threads01():
+    relations = ConcurrentMultiMap(shards=4)
+    threads = [
+        threading.Thread(target=churn, args=(relations, seed, 2_000))
+        for seed in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    result = relations.to_multimap()
+    assert len(relations) == len(result) == sum(1 for _ in relations)
+    assert all(
+        relations.target(dst).count(src) == relations.source(src).count(dst)
+        for src, dst in set(relations)
+    )
+
+
+# Profile a pool of threads churning a map behind sharded locks.
+@pytest.mark.stress
+@pytest.mark.benchmark(group="multimap-threads")
+def test__concurrentmultimap_threads02(benchmark):
+    benchmark.pedantic(
+        lambda: run_threads(ConcurrentMultiMap()),
+        rounds=3,
+    )
+
+
+# Profile a pool of threads churning a map behind a global lock.
+@pytest.mark.stress
+@pytest.mark.benchmark(group="multimap-threads")
+def test__concurrentmultimap_threads03(benchmark):
+    benchmark.pedantic(
+        lambda: run_threads(LockedMultiMap()),
+        rounds=3,
+    )
+
+
+# Regular map serialized behind a single global lock.
+class LockedMultiMap:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._mapping = MultiMap()
+
+    def add(self, src, dst):
+        with self._lock:
+            self._mapping.add(src, dst)
+        return self
+
+    def remove(self, src, dst):
+        with self._lock:
+            self._mapping.remove(src, dst)
+        return self
+
+    def source(self, src):
+        with self._lock:
+            return self._mapping.source(src).to_list()
+
+    def target(self, dst):
+        with self._lock:
+            return self._mapping.target(dst).to_list()
+
+
+# Randomly read, add & remove relationships of a map.
+def churn(relations, seed: int, n: int):
+    rnd = random.Random(seed)
+    for _ in range(n):
+        src, dst = rnd.randrange(0, 50), rnd.randrange(0, 50)
+        op = rnd.random()
+        if op < 0.5:
+            relations.source(src)
+            relations.target(dst)
+        elif op < 0.8:
+            relations.add(src, dst)
+        else:
+            relations.remove(src, dst)
+
+
+# Churn a map across a pool of threads.
+def run_threads(relations, threads: int = 8, n: int = 2_000):
+    pool = [
+        threading.Thread(target=churn, args=(relations, seed, n))
+        for seed in range(threads)
+    ]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+
+
+# Sample test data with duplicate, many-to-many, mixed types & None values allowed.
+@pytest.fixture
+def data() -> Iterable[Relation]:
+    return [
+        (1, "a"), (2, "a"), (2, "c"), (2, "c"), (3, "b"), (3, "c"), (3, "d"),
+        (None, 'd'), (4, None)
+    ]
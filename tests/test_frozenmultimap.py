@@ -0,0 +1,188 @@
+#!usr/bin/env python
+
+from pyutils.frozenmultimap import *
+import pytest
+import random
+
+
+# Maps equal content of identical mutable & immutable maps.
+@pytest.mark.unit
+def test__frozenmultimap_equality01(data):
+    relations = FrozenMultiMap(data)
+    assert relations == FrozenMultiMap(MultiMap(data))
+    assert relations == MultiMap(data)
+    assert MultiMap(data) == relations
+    assert relations != FrozenMultiMap(data[1:])
+    assert relations.to_multimap() == MultiMap(data)
+
+
+# Empty data should have empty source & targets
+@pytest.mark.unit
+def test__frozenmultimap_items00():
+    relations = FrozenMultiMap()
+    assert relations.domain == set()
+    assert relations.range == set()
+    assert len(relations) == 0
+    assert list(relations) == []
+
+
+# Ensure non-duplicate sources & targets are returned.
+@pytest.mark.unit
+def test__frozenmultimap_items01(data):
+    relations = FrozenMultiMap(data)
+    assert relations.domain == {1, 2, 3, 4, None}
+    assert relations.range == {'a', 'b', 'c', 'd', None}
+    assert sorted(relations, key=str) == sorted(data, key=str)
+    assert len(relations) == 9
+    assert relations.size(distinct=True) == 8
+
+
+# Check for existing & non existing items.
+@pytest.mark.unit
+def test__frozenmultimap_membership01(data):
+    relations = FrozenMultiMap(data)
+    assert (1, 'a') in relations
+    assert (None, 'd') in relations
+    assert (4, None) in relations
+    assert (1, 'c') not in relations
+    assert (0, 'a') not in relations
+    assert (2, MultiMap.UNDEFINED) in relations
+    assert (MultiMap.UNDEFINED, 'b') in relations
+    assert (MultiMap.UNDEFINED, 'z') not in relations
+
+
+# Retrieving sources & targets as functions or indices
+@pytest.mark.unit
+def test__frozenmultimap_get01(data):
+    relations = FrozenMultiMap(data)
+    assert relations(2) == relations[2] == ['a', 'c', 'c']
+    assert relations.target('c') == [2, 2, 3]
+    assert relations.target('c').counts() == {2: 2, 3: 1}
+    assert 'c' in relations[2] and 'b' not in relations[2]
+    assert len(relations[3]) == 3
+    assert relations(0) == relations.target('z') == []
+    assert not relations(0)
+
+
+# Inverting should swap directions without copying.
+@pytest.mark.unit
+def test__frozenmultimap_inverse01(data):
+    original = FrozenMultiMap(data)
+    relations = original.inverse()
+    assert relations == MultiMap(data).inverse()
+    assert relations.domain == original.range
+    assert relations['c'] == [2, 2, 3]
+    assert relations._forward is original._backward
+    assert relations.inverse() == original
+
+
+# Compressed rows should cost 8 bytes per distinct relation each way.
+@pytest.mark.unit
+def test__frozenmultimap_memory01():
+    rnd = random.Random(0)
+    relations = FrozenMultiMap(
+        (rnd.randrange(0, 100), rnd.randrange(0, 100))
+        for _ in range(5_000)
+    )
+    nodes = len(relations._nodes) + 1
+    assert relations.nbytes == 16 * relations.size(distinct=True) + 16 * nodes
+
+
+# Saved maps should open back to identical maps.
+@pytest.mark.unit
+def test__frozenmultimap_disk01(data, tmp_path):
+    path = str(tmp_path / "relations.pymm")
+    assert MultiMap(data).save(path) == MultiMap(data)
+    relations = MultiMap.open(path)
+    assert isinstance(relations, FrozenMultiMap)
+    assert relations == MultiMap(data)
+    assert len(relations) == 9
+    assert relations.size(distinct=True) == 8
+    assert relations[2] == ['a', 'c', 'c']
+    assert relations.target('c').counts() == {2: 2, 3: 1}
+    assert (None, 'd') in relations and (4, None) in relations
+    assert (1, 'c') not in relations and ([], 'c') not in relations
+    assert relations[99] == relations.target('z') == []
+    assert relations.inverse()['d'] == [3, None]
+    assert relations.domain == {1, 2, 3, 4, None}
+
+
+# Empty maps should round trip to disk.
+@pytest.mark.unit
+def test__frozenmultimap_disk02(tmp_path):
+    path = str(tmp_path / "relations.pymm")
+    FrozenMultiMap().save(path)
+    relations = FrozenMultiMap.open(path)
+    assert len(relations) == 0
+    assert list(relations) == []
+    assert relations['a'] == []
+
+
+# Opening unknown files should fail.
+@pytest.mark.unit
+def test__frozenmultimap_disk03(tmp_path):
+    path = tmp_path / "relations.pymm"
+    path.write_bytes(b'0' * 64)
+    with pytest.raises(ValueError):
+        FrozenMultiMap.open(str(path))
+
+
+# Large maps should open back to identical maps.
+@pytest.mark.unit
+def test__frozenmultimap_disk04(tmp_path):
+    rnd = random.Random(0)
+    original = MultiMap(
+        (rnd.randrange(0, 500), str(rnd.randrange(0, 500)))
+        for _ in range(5_000)
+    )
+    path = str(tmp_path / "relations.pymm")
+    original.save(path)
+    relations = MultiMap.open(path)
+    assert relations == original
+    assert all(relations[src] == original[src] for src in original.domain)
+
+
+# Opened maps should find equal nodes regardless of their type or identity.
+@pytest.mark.unit
+def test__frozenmultimap_disk05(tmp_path):
+    path = str(tmp_path / "relations.pymm")
+    MultiMap([(('word', 'word'), 'x'), (1, 'y'), (2.5, b'z')]).save(path)
+    with MultiMap.open(path) as relations:
+        key = (''.join(['wo', 'rd']), ''.join(['wor', 'd']))
+        assert relations[key] == ['x'] and (key, 'x') in relations
+        assert relations[1.0] == relations[True] == ['y']
+        assert relations[2.5] == [b'z'] and relations[2] == []
+        assert relations.target(b'z') == [2.5]
+    with pytest.raises(ValueError):
+        relations._nodes._keys.tobytes()
+    with pytest.raises(TypeError):
+        MultiMap([(frozenset(), 'x')]).save(path)
+
+
+# Opened maps should answer wildcard lookups & compare without loading every node.
+@pytest.mark.unit
+def test__frozenmultimap_disk06(data, tmp_path):
+    path = str(tmp_path / "relations.pymm")
+    MultiMap(data).save(path)
+    with MultiMap.open(path) as relations:
+        assert (3, MultiMap.UNDEFINED) in relations and (MultiMap.UNDEFINED, None) in relations
+        assert ('a', MultiMap.UNDEFINED) not in relations and (MultiMap.UNDEFINED, 3) not in relations
+        assert ([], MultiMap.UNDEFINED) not in relations
+        assert 'domain' not in vars(relations) and 'range' not in vars(relations)
+        assert relations == relations and relations == FrozenMultiMap(reversed(data))
+        assert relations == MultiMap(data) and MultiMap(data) == relations
+        assert relations != MultiMap(data[1:]) and relations != FrozenMultiMap(data[1:])
+        assert relations.inverse() != relations and relations.inverse() == MultiMap(data).inverse()
+        swapped = [(2, 'a'), (2, 'c'), (2, 'b'), (3, 'a'), (3, 'c'), (3, 'd'), (None, 'd'), (4, None), (1, 'c')]
+        assert relations != MultiMap(swapped) and relations != FrozenMultiMap(swapped)
+        with MultiMap.open(path) as reopened:
+            assert reopened._nodes == relations._nodes and reopened == relations
+
+
+# Sample test data with duplicate, many-to-many, mixed types & None values allowed.
+@pytest.fixture
+def data() -> Iterable[Relation]:
+    return [
+        (1, "a"), (2, "a"), (2, "c"), (2, "c"), (3, "b"), (3, "c"), (3, "d"),
+        (None, 'd'), (4, None)
+    ]
@@ -1,9 +1,14 @@
 #!usr/bin/env python
 
 from pyutils.multimap import *
+from decimal import Decimal
+import os
+import pickle
 import pytest
 import random
 import string
+import subprocess
+import sys
 
 
 # Maps equal itself
@@ -20,6 +25,55 @@ def test__multimap_equality01(data):
     assert relations == MultiMap(data)
 
 
+# Maps with equal relationships should share fingerprints regardless of order.
+@pytest.mark.unit
+def test__multimap_fingerprint01(data):
+    relations = MultiMap(data)
+    assert relations.fingerprint() == MultiMap(reversed(data)).fingerprint()
+    assert relations.fingerprint() != MultiMap(data[1:]).fingerprint()
+    assert relations.fingerprint() != MultiMap(data + data[:1]).fingerprint()
+    assert MultiMap().fingerprint() == 0
+
+
+# Fingerprints should follow modifications of the map.
+@pytest.mark.unit
+def test__multimap_fingerprint02(data):
+    relations = MultiMap(data)
+    fingerprint = relations.fingerprint()
+    relations.add(5, 'e').remove(2, MultiMap.UNDEFINED).update([(2, 'a'), (2, 'c'), (2, 'c')])
+    assert relations.fingerprint() != fingerprint
+    relations.remove(5, 'e')
+    assert relations.fingerprint() == fingerprint
+    assert relations.inverse(view=True).fingerprint() == relations.inverse().fingerprint()
+    assert relations.inverse(copy=False).fingerprint() == MultiMap(data).inverse().fingerprint()
+    assert pickle.loads(pickle.dumps(relations)).fingerprint() == relations.fingerprint()
+    assert relations.clear().fingerprint() == 0
+
+
+# Fingerprints should separate colliding builtin hashes & be stable across processes.
+@pytest.mark.unit
+def test__multimap_fingerprint03(data):
+    assert MultiMap([(-1, 'a')]).fingerprint() != MultiMap([(-2, 'a')]).fingerprint()
+    assert MultiMap([(1, 'a')]).fingerprint() == MultiMap([(1.0, 'a')]).fingerprint()
+    script = f"from pyutils.multimap import MultiMap; print(MultiMap({data!r}).fingerprint())"
+    output = subprocess.run(
+        [sys.executable, '-c', script], capture_output=True, text=True, check=True,
+        env={**os.environ, 'PYTHONHASHSEED': '1'},
+    ).stdout
+    assert int(output) == MultiMap(data).fingerprint()
+
+
+# Maps of equal numeric nodes of other types should equal & share fingerprints.
+@pytest.mark.unit
+def test__multimap_fingerprint04():
+    np = pytest.importorskip("numpy")
+    relations = MultiMap([(1, 'a'), (1.5, 'b')])
+    for other in (MultiMap([(Decimal(1), 'a'), (Decimal('1.5'), 'b')]), MultiMap([(np.int64(1), 'a'), (np.float64(1.5), 'b')])):
+        assert other == relations and relations == other
+        assert other.fingerprint() == relations.fingerprint()
+        assert other.inverse(view=True) == relations.inverse()
+
+
 # Two maps with different relationships should not equal.
 @pytest.mark.unit
 def test__multimap_equality02(data, random_item):
@@ -54,12 +108,16 @@ def test__multimap_membership00(data):
 def test__multimap_membership01(data):
     relations = MultiMap(data)
     assert (1, 'a') in relations
-    assert (None, 'a') in relations
-    assert (1, None) in relations
+    assert (None, 'd') in relations
+    assert (4, None) in relations
+    assert (None, 'a') not in relations
+    assert (1, None) not in relations
     assert (1, 'z') not in relations
     assert (0, 'a') not in relations
     assert (None, 'z') not in relations
     assert (0, None) not in relations
+    assert (2, MultiMap.UNDEFINED) in relations
+    assert (MultiMap.UNDEFINED, 'z') not in relations
 
 
 # Retrieving data should preserve dupes.
@@ -92,6 +150,50 @@ def test__multimap_collection02():
     assert len(result) == 1
 
 
+# Arithmatic inplace addition & subtraction should modify left hand map.
+@pytest.mark.unit
+def test__multimap_collection03():
+    original = MultiMap([(1, 'a'), (2, 'b')])
+    result = original
+    result += MultiMap([(1, 'a'), (3, 'c')])
+    assert id(result) == id(original)
+    assert result == MultiMap([(1, 'a'), (2, 'b'), (1, 'a'), (3, 'c')])
+    result -= MultiMap([(1, 'a'), (2, 'b'), (2, 'b'), (4, 'd')])
+    assert id(result) == id(original)
+    assert result == MultiMap([(1, 'a'), (3, 'c')])
+    result -= [(3, 'c')]
+    assert result == MultiMap([(1, 'a')])
+
+
+# Intersection of relationships should keep least shared frequencies.
+@pytest.mark.unit
+def test__multimap_collection04(data):
+    m1 = MultiMap(data)
+    m2 = MultiMap([(2, 'c'), (2, 'c'), (2, 'c'), (3, 'b'), (3, 'b'), (5, 'e')])
+    result = m1 & m2
+    assert id(result) != id(m1) != id(m2)
+    assert result == m2 & m1 == MultiMap([(2, 'c'), (2, 'c'), (3, 'b')])
+    assert len(result) == 3
+    m1 &= m2
+    assert m1 == result
+    assert m1 & MultiMap() == MultiMap()
+
+
+# Union of relationships should keep greatest frequencies.
+@pytest.mark.unit
+def test__multimap_collection05(data):
+    m1 = MultiMap(data)
+    m2 = MultiMap([(2, 'c'), (2, 'c'), (2, 'c'), (3, 'b'), (3, 'b'), (5, 'e')])
+    result = m1 | m2
+    assert id(result) != id(m1) != id(m2)
+    assert result == m2 | m1
+    assert result == MultiMap(data + [(2, 'c'), (3, 'b'), (5, 'e')])
+    assert len(result) == 12
+    m1 |= m2
+    assert m1 == result
+    assert m1 | m1 == m1
+
+
 # Ensure relations are iterable (without exceptions)
 @pytest.mark.unit
 def test__multimap_iterable01(data):
@@ -141,6 +243,48 @@ def test__multimap_inverse02(data):
     )
 
 
+# Inverse all relationships as a view sharing the original mapping.
+@pytest.mark.unit
+def test__multimap_inverse03(data):
+    original = MultiMap(data)
+    relations = original.inverse(view=True)
+    assert relations == original.inverse()
+    assert original.inverse() == relations
+    assert len(relations) == len(original)
+    assert relations.domain == original.range
+    assert relations['c'] == [2, 2, 3]
+    assert relations.target(2) == ['a', 'c', 'c']
+    assert ('c', 3) in relations and (3, 'c') not in relations
+    assert relations.inverse(view=True) is original
+
+
+# Inverse views should reflect subsequent modifications of the original.
+@pytest.mark.unit
+def test__multimap_inverse04(data):
+    original = MultiMap(data)
+    relations = original.inverse(view=True)
+    snapshot = relations.copy()
+    original.add(5, 'e').remove(2, MultiMap.UNDEFINED)
+    assert relations('e') == [5]
+    assert relations('c') == [3]
+    assert list(relations) == list(original.inverse())
+    assert len(relations) == 7
+    assert snapshot == MultiMap(data).inverse()
+    assert isinstance(snapshot, MultiMap)
+    assert MultiMap(relations) == original.inverse()
+
+
+# Merging a map with its own inverse view should add each relationship once.
+@pytest.mark.unit
+def test__multimap_inverse05(data):
+    relations = MultiMap(data)
+    expected = MultiMap(data) + MultiMap(data).inverse()
+    relations.update(relations.inverse(view=True))
+    assert relations == expected and len(relations) == 18
+    relations += relations.inverse(view=True)
+    assert relations == expected + expected and len(relations) == 36
+
+
 # Epty data should have empty cardinality
 @pytest.mark.unit
 def test__multimap_cardinality00():
@@ -155,6 +299,32 @@ def test__multimap_cardinality01(data):
     assert len(relations) == relations.size() == 9
 
 
+# Count cardinality of distinct relationships
+@pytest.mark.unit
+def test__multimap_cardinality02(data):
+    relations = MultiMap(data)
+    assert relations.size(distinct=True) == 8
+    assert relations.inverse().size(distinct=True) == 8
+
+
+# Cardinality should follow insertions & deletions of relationships
+@pytest.mark.unit
+def test__multimap_cardinality03(data):
+    relations = MultiMap(data)
+    relations.add(2, 'c').remove(1, 'a').remove(1, 'z')
+    assert len(relations) == 9
+    assert relations.size(distinct=True) == 7
+    relations.remove(2, MultiMap.UNDEFINED)
+    assert len(relations) == 5
+    assert relations.size(distinct=True) == 5
+    relations.remove(MultiMap.UNDEFINED, 'd')
+    assert len(relations) == relations.size(distinct=True) == 3
+    assert relations.range == {'b', 'c', None}
+    relations.clear()
+    assert len(relations) == relations.size(distinct=True) == 0
+    assert not relations
+
+
 # Retrieving non existing sources should not fail
 @pytest.mark.unit
 def test__multimap_get00():
@@ -189,6 +359,110 @@ def test__multimap_get04(data):
     assert relations.target('zz') == []
 
 
+# Node views should reflect subsequent modifications of the map.
+@pytest.mark.unit
+def test__multimap_views01(data):
+    relations = MultiMap(data)
+    domain, range_ = relations.domain, relations.range
+    assert 3 in domain and 'b' in range_
+    relations.remove(3, MultiMap.UNDEFINED).add(5, 'e')
+    assert 3 not in domain and 'b' not in range_
+    assert domain == {1, 2, 4, 5, None}
+    assert range_ == {'a', 'c', 'd', 'e', None}
+    assert len(domain) == 5
+    assert domain & {1, 9} == {1}
+
+
+# Neighbour views should reflect subsequent modifications of the map.
+@pytest.mark.unit
+def test__multimap_views02(data):
+    relations = MultiMap(data)
+    targets = relations.source(2)
+    snapshot = targets.to_list()
+    assert len(targets) == 3 and 'c' in targets and 'b' not in targets
+    assert list(targets.distinct()) == ['a', 'c']
+    assert targets.counts() == {'a': 1, 'c': 2}
+    relations.remove(2, 'c').add(2, 'b')
+    assert targets == ['a', 'c', 'b']
+    assert snapshot == ['a', 'c', 'c']
+    relations.remove(2, MultiMap.UNDEFINED)
+    assert not targets and len(targets) == 0
+    assert targets.counts() == {}
+
+
+# Neighbour views should not be modifiable.
+@pytest.mark.unit
+def test__multimap_views03(data):
+    counts = MultiMap(data).target('c').counts()
+    with pytest.raises(TypeError):
+        counts[2] = 5
+
+
+# Batch lookups should map each node to its related nodes.
+@pytest.mark.unit
+def test__multimap_batch01(data):
+    relations = MultiMap(data)
+    result = relations.source_many([2, 99, None])
+    assert result == {2: ['a', 'c', 'c'], 99: [], None: ['d']}
+    assert relations.target_many(['c']) == {'c': [2, 2, 3]}
+    assert relations.source_many([]) == {}
+
+
+# Batch lookups should flatten related nodes by offsets.
+@pytest.mark.unit
+def test__multimap_batch02(data):
+    relations = MultiMap(data)
+    offsets, values = relations.source_many([2, 99, 3], how="flat")
+    assert offsets == [0, 3, 3, 6]
+    assert values == ['a', 'c', 'c', 'b', 'c', 'd']
+    assert relations.target_many([], how="flat") == ([0], [])
+
+
+# Batch lookups should union distinct related nodes.
+@pytest.mark.unit
+def test__multimap_batch03(data):
+    relations = MultiMap(data)
+    assert relations.source_many([2, 3, 99], how="union") == {'a', 'b', 'c', 'd'}
+    assert relations.target_many(['c', 'a'], how="union") == {1, 2, 3}
+    assert relations.inverse(view=True).source_many(['c', 'a'], how="union") == {1, 2, 3}
+    with pytest.raises(ValueError):
+        relations.source_many([2], how="unknown")
+
+
+# Composing maps should join on intermediate nodes multiplying frequencies.
+@pytest.mark.unit
+def test__multimap_compose01(data):
+    words = MultiMap(data)
+    concepts = MultiMap([('a', 'x'), ('c', 'y'), ('c', 'y'), ('c', 'z'), ('e', 'x')])
+    result = words.compose(concepts)
+    assert result == MultiMap([
+        (1, 'x'), (2, 'x'), (2, 'y'), (2, 'y'), (2, 'y'), (2, 'y'), (2, 'z'), (2, 'z'),
+        (3, 'y'), (3, 'y'), (3, 'z'),
+    ])
+    assert result == MultiMap(
+        (src, dst)
+        for src, middle in words
+        for dst in concepts[middle]
+    )
+    assert words.compose(MultiMap()) == MultiMap().compose(words) == MultiMap()
+
+
+# Traversing should expand relationships hop by hop.
+@pytest.mark.unit
+def test__multimap_reachable01():
+    graph = MultiMap([(1, 2), (2, 3), (3, 4), (4, 1), (2, 5), (6, 1)])
+    assert graph.reachable([1], hops=1) == {2}
+    assert graph.reachable([1], hops=2) == {2, 3, 5}
+    assert graph.reachable([1]) == {2, 3, 4, 5}
+    assert graph.reachable([1, 2], hops=1) == {3, 5}
+    assert graph.reachable(iter([1]), hops=1, direction="backward") == {4, 6}
+    assert graph.reachable([5], direction="both", hops=2) == {1, 2, 3}
+    assert graph.reachable([99]) == set()
+    assert graph.inverse(view=True).reachable([1], hops=1) == {4, 6}
+    with pytest.raises(ValueError):
+        graph.reachable([1], direction="sideways")
+
+
 # Inserting items should add to the relationship
 @pytest.mark.unit
 def test__multimap_insert01(random_item):
@@ -216,6 +490,39 @@ def test__multimap_insert03(random_item):
     assert MultiMap().add(MultiMap.UNDEFINED, MultiMap.UNDEFINED) == MultiMap()
 
 
+# Bulk inserting items should match inserting them one by one
+@pytest.mark.unit
+def test__multimap_insert04(data):
+    original = MultiMap()
+    relations = original.update(data)
+    assert id(relations) == id(original)
+    assert relations == MultiMap(data) == MultiMap.from_pairs(data)
+    assert list(relations) == data
+    assert relations.update(relations) == MultiMap(data + data)
+
+
+# Bulk inserting illegal items should silently skip them
+@pytest.mark.unit
+def test__multimap_insert05(random_item):
+    src, dst = random_item
+    relations = MultiMap().update([
+        (src, MultiMap.UNDEFINED), (MultiMap.UNDEFINED, dst), random_item
+    ])
+    assert relations == MultiMap([random_item])
+    assert len(relations) == 1
+
+
+# Bulk inserting grouped items should expand to all relationships
+@pytest.mark.unit
+def test__multimap_insert06(data):
+    relations = MultiMap.from_grouped({
+        1: ['a'], 2: ['a', 'c', 'c'], 3: ('b', 'c', 'd'), None: {'d'}, 4: [None], 5: []
+    })
+    assert relations == MultiMap(data)
+    assert 5 not in relations.domain
+    assert len(relations) == 9
+
+
 # Removing (possibly duplicated) specific items should drop one of the relationships
 @pytest.mark.unit
 def test__multimap_delete01():
@@ -252,6 +559,26 @@ def test__multimap_delete04():
     assert id(relations) == id(original)
 
 
+# Bulk removing items should drop one relationship per occurrence.
+@pytest.mark.unit
+def test__multimap_delete05(data):
+    original = MultiMap(data)
+    relations = original.remove_many([(2, 'c'), (3, 'c'), (3, 'c'), (9, 'z'), (None, 'd')])
+    assert id(relations) == id(original)
+    assert relations == MultiMap([(1, "a"), (2, "a"), (2, "c"), (3, "b"), (3, "d"), (4, None)])
+    assert len(relations) == relations.size(distinct=True) == 6
+    assert relations.target('c') == [2]
+
+
+# Bulk removing items should honor undefined nodes & other maps.
+@pytest.mark.unit
+def test__multimap_delete06(data):
+    relations = MultiMap(data).difference_update([(2, MultiMap.UNDEFINED), (MultiMap.UNDEFINED, 'd')])
+    assert relations == MultiMap([(1, "a"), (3, "b"), (3, "c"), (4, None)])
+    assert relations.difference_update(MultiMap([(3, "b"), (3, "b")])) == MultiMap([(1, "a"), (3, "c"), (4, None)])
+    assert relations.difference_update(relations) == MultiMap()
+
+
 # Removing data from empty state should have no effect.
 @pytest.mark.unit
 def test__multimap_clear00():
@@ -283,6 +610,568 @@ def test__multimap_clone01(data):
     assert relations == original
 
 
+# Modifying copies should not affect the original & vice versa.
+@pytest.mark.unit
+def test__multimap_clone02(data):
+    original = MultiMap(data)
+    relations = original.copy()
+    relations.add(2, 'c').remove(3, 'b').add(5, 'e')
+    assert original == MultiMap(data)
+    assert original[2] == ['a', 'c', 'c'] and original[3] == ['b', 'c', 'd']
+    assert original.target('c') == [2, 2, 3]
+    original.remove(2, MultiMap.UNDEFINED).add(1, 'a')
+    assert relations == MultiMap(data).add(2, 'c').remove(3, 'b').add(5, 'e')
+    assert relations[2] == ['a', 'c', 'c', 'c']
+    assert original == MultiMap([(1, "a"), (3, "b"), (3, "c"), (3, "d"), (None, 'd'), (4, None), (1, "a")])
+
+
+# Copies of copies should remain isolated from each other.
+@pytest.mark.unit
+def test__multimap_clone03(data):
+    original = MultiMap(data)
+    child = original.copy().add(1, 'b')
+    grandchild = child.copy().add(1, 'c')
+    child.add(1, 'd')
+    original.inverse(copy=False).add('a', 9)
+    assert original.inverse() == MultiMap(data + [(9, 'a')])
+    assert child[1] == ['a', 'b', 'd']
+    assert grandchild[1] == ['a', 'b', 'c']
+    assert len(child.clear()) == 0 and len(grandchild) == 11
+    assert grandchild.fingerprint() == MultiMap(data + [(1, 'b'), (1, 'c')]).fingerprint()
+
+
+# Maps written to files should read back to identical maps.
+@pytest.mark.unit
+@pytest.mark.parametrize("name", ["relations.csv", "relations.tsv", "relations.jsonl", "relations.tsv.gz"])
+def test__multimap_file01(tmp_path, name):
+    original = MultiMap([('1', 'a'), ('2', 'a'), ('2', 'c'), ('2', 'c'), ('x,y', 'quoted "z"')])
+    path = str(tmp_path / name)
+    assert original.to_file(path) == original
+    assert MultiMap.from_file(path) == original
+    assert MultiMap.from_file(path, collapse=False, chunk_size=2) == original
+    if name.endswith('.gz'):
+        with open(path, 'rb') as file:
+            assert file.read(2) == b'\x1f\x8b'
+
+
+# Json files should preserve node types & grouped rows.
+@pytest.mark.unit
+def test__multimap_file02(data, tmp_path):
+    path = str(tmp_path / "relations.data")
+    MultiMap(data).to_file(path, fmt="jsonl")
+    assert open(path).read().splitlines()[2] == '[2, "c", 2]'
+    assert MultiMap.from_file(path, fmt="jsonl") == MultiMap(data)
+    nested = MultiMap([((1, 2), 'a'), ((1, (2, 'b')), ()), ('c', (3,))])
+    path = str(tmp_path / "relations.jsonl")
+    nested.to_file(path)
+    assert MultiMap.from_file(path) == nested
+    assert MultiMap.from_file(path)[(1, 2)] == ['a']
+
+
+# Reading files with repeated rows, frequencies & blank lines.
+@pytest.mark.unit
+def test__multimap_file03(tmp_path):
+    path = tmp_path / "relations.csv"
+    path.write_text("a,x,3\na,x\n\nb,y\r\nb,y,2\n")
+    assert MultiMap.from_file(str(path), chunk_size=1) == MultiMap([('a', 'x')] * 4 + [('b', 'y')] * 3)
+
+
+# Reading malformed or unknown files should fail.
+@pytest.mark.unit
+def test__multimap_file04(tmp_path):
+    path = tmp_path / "relations.csv"
+    path.write_text("a,b,c,d\n")
+    with pytest.raises(ValueError):
+        MultiMap.from_file(str(path))
+    with pytest.raises(ValueError):
+        MultiMap.from_file(str(path), fmt="xml")
+    with pytest.raises(ValueError):
+        MultiMap().to_file(str(tmp_path / "relations.xml"))
+    with pytest.raises(ValueError):
+        MultiMap().to_file(str(tmp_path / "relations.out"), fmt="xml")
+    assert not (tmp_path / "relations.out").exists()
+
+
+# Profile inserting relationships one at a time.
+@pytest.mark.stress
+@pytest.mark.benchmark(group="multimap-ingest")
+def test__multimap_ingest00(benchmark, edges):
+    def ingest():
+        relations = MultiMap()
+        for src, dst in edges:
+            relations.add(src, dst)
+        return relations
+    assert len(benchmark(ingest)) == len(edges)
+
+
+# Profile inserting relationships in bulk.
+@pytest.mark.stress
+@pytest.mark.benchmark(group="multimap-ingest")
+def test__multimap_ingest01(benchmark, edges):
+    assert len(benchmark(MultiMap.from_pairs, edges)) == len(edges)
+
+
+# Profile removing every relationship of a hub node one at a time.
+@pytest.mark.stress
+@pytest.mark.benchmark(group="multimap-remove")
+def test__multimap_remove00(benchmark):
+    hub = [(0, dst) for dst in range(20_000)]
+
+    def remove(relations):
+        for src, dst in hub:
+            relations.remove(src, dst)
+        return relations
+    relations = benchmark.pedantic(remove, setup=lambda: ((MultiMap(hub),), {}), rounds=5)
+    assert len(relations) == 0
+
+
+# Profile removing every relationship of a hub node in bulk.
+@pytest.mark.stress
+@pytest.mark.benchmark(group="multimap-remove")
+def test__multimap_remove01(benchmark):
+    hub = [(0, dst) for dst in range(20_000)]
+    relations = benchmark.pedantic(
+        lambda relations: relations.remove_many(hub),
+        setup=lambda: ((MultiMap(hub),), {}),
+        rounds=5,
+    )
+    assert len(relations) == 0
+
+
+# Serialized maps should load back to identical maps.
+@pytest.mark.unit
+def test__multimap_pickle01(data):
+    relations = pickle.loads(pickle.dumps(MultiMap(data)))
+    assert relations == MultiMap(data)
+    assert list(relations) == data
+    assert len(relations) == 9
+    assert relations.size(distinct=True) == 8
+    assert pickle.loads(pickle.dumps(MultiMap())) == MultiMap()
+
+
+# Serialized maps should be more compact than their default state.
+@pytest.mark.unit
+def test__multimap_pickle02(edges):
+    relations = MultiMap(edges)
+    assert len(pickle.dumps(relations)) * 1.5 < len(pickle.dumps(vars(relations)))
+
+
+# Profile loading a map from its default serialized state.
+@pytest.mark.stress
+@pytest.mark.benchmark(group="multimap-pickle")
+def test__multimap_pickle03(benchmark, edges):
+    payload = pickle.dumps(vars(MultiMap(edges)))
+    benchmark.extra_info["bytes"] = len(payload)
+    assert benchmark(pickle.loads, payload)['_size'] == len(edges)
+
+
+# Profile loading a map from its compact serialized state.
+@pytest.mark.stress
+@pytest.mark.benchmark(group="multimap-pickle")
+def test__multimap_pickle04(benchmark, edges):
+    payload = pickle.dumps(MultiMap(edges))
+    benchmark.extra_info["bytes"] = len(payload)
+    assert len(benchmark(pickle.loads, payload)) == len(edges)
+
+
+# Serialized maps should rehash when loaded by processes of another hash seed.
+@pytest.mark.unit
+def test__multimap_pickle05(data):
+    relations = MultiMap(data)
+    sources, freqs, seed, totals = relations.__getstate__()
+    assert totals == (9, 8, relations._forward_hash, relations._backward_hash)
+    loaded = MultiMap.__new__(MultiMap)
+    loaded.__setstate__((sources, freqs, seed + 1, (0, 0, 0, 0)))
+    assert loaded == relations and len(loaded) == 9
+    assert loaded.inverse(view=True) == relations.inverse()
+
+
+# Profile snapshotting a map by rebuilding it before a small edit.
+@pytest.mark.stress
+@pytest.mark.benchmark(group="multimap-snapshot")
+def test__multimap_snapshot00(benchmark, edges):
+    relations = MultiMap(edges)
+    benchmark(lambda: MultiMap(relations).add(0, 0).remove(*edges[0]))
+    assert relations == MultiMap(edges)
+
+
+# Profile snapshotting a map by copy on write before a small edit.
+@pytest.mark.stress
+@pytest.mark.benchmark(group="multimap-snapshot")
+def test__multimap_snapshot01(benchmark, edges):
+    relations = MultiMap(edges)
+    benchmark(lambda: relations.copy().add(0, 0).remove(*edges[0]))
+    assert relations == MultiMap(edges)
+
+
+# Degrees should count (distinct) relationships of a node.
+@pytest.mark.unit
+def test__multimap_degree01(data):
+    relations = MultiMap(data)
+    assert relations.out_degree(2) == 3 and relations.out_degree(2, distinct=True) == 2
+    assert relations.in_degree("c") == 3 and relations.in_degree("c", distinct=True) == 2
+    assert relations.out_degree("missing") == relations.in_degree("missing") == 0
+    assert len(relations.source(3)) == 3 and len(relations.target("a")) == 2
+
+
+# Hubs should rank nodes by relationships & track modifications.
+@pytest.mark.unit
+def test__multimap_degree02(data):
+    relations = MultiMap(data)
+    assert sorted(relations.hubs(2)) == [(2, 3), (3, 3)]
+    assert relations.hubs(1, direction="backward") == [("c", 3)]
+    assert relations.degree_histogram() == {3: 2, 1: 3}
+    relations.update([(1, "z")] * 3).remove(3, "b")
+    assert relations.hubs(1) == [(1, 4)]
+    assert relations.degree_histogram() == {4: 1, 3: 1, 2: 1, 1: 2}
+    assert relations.degree_histogram("backward") == {3: 2, 2: 2, 1: 1}
+    del relations[1, MultiMap.UNDEFINED]
+    assert relations.hubs(2) == [(2, 3), (3, 2)] and len(relations.hubs()) == 4
+    assert relations.degree_histogram("backward") == {3: 1, 2: 1, 1: 2}
+    with pytest.raises(ValueError):
+        relations.hubs(direction="sideways")
+
+
+# Degree indices should be consistent across copies, inverses & views.
+@pytest.mark.unit
+def test__multimap_degree03(data):
+    relations = MultiMap(data)
+    relations.hubs()
+    clone = relations.copy().add(3, "e")
+    assert sorted(relations.hubs(2)) == [(2, 3), (3, 3)] and clone.hubs(1) == [(3, 4)]
+    assert relations.inverse(view=True).hubs(1) == [("c", 3)]
+    assert relations.inverse(view=True).out_degree("d") == 2
+    relations.inverse(copy=False)
+    assert relations.hubs(1) == [("c", 3)] and relations.out_degree("c") == 3
+    assert relations.clear().hubs() == [] and relations.degree_histogram() == {}
+
+
+# Relationships should be added, removed & counted in bulk.
+@pytest.mark.unit
+def test__multimap_count01(data):
+    relations = MultiMap(data).add(1, 'a', count=4).add(5, 'e', count=0)
+    assert relations.count(1, 'a') == 5 and relations.count(5, 'e') == 0
+    assert (5, 'e') not in relations and len(relations) == len(data) + 4
+    relations.remove(1, 'a', count=2).remove(2, 'c', count=10)
+    assert relations.count(1, 'a') == 3 and (2, 'c') not in relations
+    assert relations.count(2, MultiMap.UNDEFINED) == 1
+    assert relations.count(MultiMap.UNDEFINED, 'd') == 2
+    assert relations.count(MultiMap.UNDEFINED, MultiMap.UNDEFINED) == len(relations)
+    assert relations.inverse(view=True).count('a', 1) == 3
+    with pytest.raises(ValueError):
+        relations.add(1, 'a', count=-1)
+
+
+# Counted items should list each distinct relationship once.
+@pytest.mark.unit
+def test__multimap_count02(data):
+    relations = MultiMap(data)
+    counts = list(relations.items(with_counts=True))
+    assert len(counts) == relations.size(distinct=True)
+    assert (2, 'c', 2) in counts and (1, 'a', 1) in counts
+    assert MultiMap().update(
+        (src, dst) for src, dst, freq in counts for _ in range(freq)
+    ) == relations
+    assert ('c', 2, 2) in relations.inverse(view=True).items(with_counts=True)
+
+
+# Profile inserting heavily duplicated relationships one at a time.
+@pytest.mark.stress
+@pytest.mark.benchmark(group="multimap-count")
+def test__multimap_count03(benchmark):
+    def build():
+        relations = MultiMap()
+        for src in range(100):
+            for _ in range(1_000):
+                relations.add(src, 0)
+        return relations
+    assert len(benchmark(build)) == 100_000
+
+
+# Profile inserting heavily duplicated relationships with counts.
+@pytest.mark.stress
+@pytest.mark.benchmark(group="multimap-count")
+def test__multimap_count04(benchmark):
+    def build():
+        relations = MultiMap()
+        for src in range(100):
+            relations.add(src, 0, count=1_000)
+        return relations
+    assert len(benchmark(build)) == 100_000
+
+
+# Maps should export to & import from sparse coordinate arrays.
+@pytest.mark.unit
+def test__multimap_sparse01(data):
+    np = pytest.importorskip("numpy")
+    relations = MultiMap(data)
+    (rows, cols, counts), sources, targets = relations.to_coo()
+    assert sources == list(relations.domain) and targets == list(relations.range)
+    assert len(rows) == len(cols) == len(counts) == relations.size(distinct=True)
+    assert counts.sum() == len(relations)
+    assert MultiMap.from_coo((rows, cols, counts), sources, targets) == relations
+    assert MultiMap.from_coo((rows, cols, counts)) == MultiMap(
+        (sources.index(src), targets.index(dst)) for src, dst in data
+    )
+    assert MultiMap.from_coo(([], [], [])) == MultiMap()
+    assert MultiMap().to_coo()[0][0].shape == (0,)
+
+
+# Importing coordinates should sum duplicates & drop empty entries.
+@pytest.mark.unit
+def test__multimap_sparse02():
+    np = pytest.importorskip("numpy")
+    rows, cols, counts = np.array([1, 0, 1, 0]), np.array([2, 0, 2, 1]), np.array([1, 3, 2, 0])
+    relations = MultiMap.from_coo((rows, cols, counts), targets=list("abc"))
+    assert relations == MultiMap([(0, 'a')] * 3 + [(1, 'c')] * 3)
+    assert relations.target('c') == [1, 1, 1]
+    with pytest.raises(ValueError):
+        MultiMap.from_coo((rows, cols, counts[:2]))
+
+
+# Maps should export to & import from scipy sparse matrices.
+@pytest.mark.unit
+def test__multimap_sparse03(data):
+    pytest.importorskip("scipy")
+    relations = MultiMap(data)
+    csr, sources, targets = relations.to_csr(sparse=True)
+    coo, _, _ = relations.to_coo(sparse=True)
+    assert csr.shape == coo.shape == (len(sources), len(targets))
+    assert (csr != coo.tocsr()).nnz == 0
+    assert csr[sources.index(2), targets.index('c')] == 2
+    assert MultiMap.from_coo(csr, sources, targets) == relations
+    assert MultiMap.from_coo(coo.T, targets, sources) == relations.inverse()
+
+
+# Profile exporting a map to sparse arrays with a python loop.
+@pytest.mark.stress
+@pytest.mark.benchmark(group="multimap-sparse")
+def test__multimap_sparse04(benchmark, edges):
+    np = pytest.importorskip("numpy")
+    relations = MultiMap(edges)
+
+    def export():
+        sources = {src: i for i, src in enumerate(relations.domain)}
+        targets = {dst: i for i, dst in enumerate(relations.range)}
+        triples = [(sources[src], targets[dst], freq) for src, dst, freq in relations.items(with_counts=True)]
+        return tuple(map(np.array, zip(*triples)))
+    benchmark(export)
+
+
+# Profile exporting a map to sparse arrays in bulk.
+@pytest.mark.stress
+@pytest.mark.benchmark(group="multimap-sparse")
+def test__multimap_sparse05(benchmark, edges):
+    pytest.importorskip("numpy")
+    relations = MultiMap(edges)
+    assert benchmark(relations.to_coo)[0][2].sum() == len(edges)
+
+
+# Profile importing a map from sparse arrays in bulk.
+@pytest.mark.stress
+@pytest.mark.benchmark(group="multimap-sparse")
+def test__multimap_sparse06(benchmark, edges):
+    pytest.importorskip("numpy")
+    matrix, sources, targets = MultiMap(edges).to_coo()
+    assert len(benchmark(MultiMap.from_coo, matrix, sources, targets)) == len(edges)
+
+
+# Patches should turn a map into another one.
+@pytest.mark.unit
+def test__multimap_patch01(data):
+    relations = MultiMap(data)
+    other = MultiMap(data).add(1, 'a', count=2).remove(2, 'c').remove(3, 'b').add(5, 'e')
+    patch = relations.diff(other)
+    assert sorted(patch, key=str) == sorted([(1, 'a', 2), (2, 'c', -1), (3, 'b', -1), (5, 'e', 1)], key=str)
+    assert relations.apply(patch) == other
+    assert relations.diff(other) == [] and relations.diff(relations) == []
+    assert MultiMap().apply(MultiMap().diff(other)) == other
+
+
+# Patches between copies should only inspect modified sources.
+@pytest.mark.unit
+def test__multimap_patch02(data):
+    relations = MultiMap(data)
+    snapshot = relations.copy()
+    assert snapshot.diff(relations) == []
+    relations.add(2, 'z').remove(None, 'd')
+    assert sorted(snapshot.diff(relations), key=str) == sorted([(2, 'z', 1), (None, 'd', -1)], key=str)
+    assert snapshot.apply(snapshot.diff(relations)) == relations
+
+
+# Journals should record net changes between checkpoints.
+@pytest.mark.unit
+def test__multimap_patch03(data):
+    relations = MultiMap(data)
+    replica = pickle.loads(pickle.dumps(relations))
+    assert relations.checkpoint() == []
+    relations.add(1, 'a').add(1, 'z').remove(1, 'z').remove(3, MultiMap.UNDEFINED)
+    assert relations.copy().checkpoint() == []
+    patch = relations.checkpoint()
+    assert sorted(patch, key=str) == sorted([(1, 'a', 1), (3, 'b', -1), (3, 'c', -1), (3, 'd', -1)], key=str)
+    assert replica.apply(patch) == relations
+    relations.inverse(copy=False)
+    assert replica.apply(relations.checkpoint()) == relations
+    relations.clear()
+    assert replica.apply(relations.checkpoint(track=False)) == relations == MultiMap()
+    relations.add(1, 'a')
+    assert relations.checkpoint() == []
+
+
+# Profile syncing a replica by reshipping the whole map after a small edit.
+@pytest.mark.stress
+@pytest.mark.benchmark(group="multimap-patch")
+def test__multimap_patch04(benchmark, edges):
+    relations = MultiMap(edges)
+
+    def sync():
+        relations.add(0, 0).remove(*edges[0]).add(*edges[0])
+        return pickle.loads(pickle.dumps(relations))
+    assert benchmark(sync) == relations
+
+
+# Profile syncing a replica by applying journaled changes after a small edit.
+@pytest.mark.stress
+@pytest.mark.benchmark(group="multimap-patch")
+def test__multimap_patch05(benchmark, edges):
+    relations, replica = MultiMap(edges), MultiMap(edges)
+    relations.checkpoint()
+
+    def sync():
+        relations.add(0, 0).remove(*edges[0]).add(*edges[0])
+        return replica.apply(pickle.loads(pickle.dumps(relations.checkpoint())))
+    assert benchmark(sync) == relations
+
+
+# Samples should only draw existing relationships.
+@pytest.mark.unit
+def test__multimap_sample01(data):
+    relations = MultiMap(data)
+    rng = random.Random(0)
+    assert all(item in relations for item in relations.sample(100, rng=rng))
+    assert all(item in relations for item in relations.sample(100, weighted=False, rng=rng))
+    assert relations.sample_source(rng=rng) in relations.domain
+    assert relations.sample_neighbour(2, weighted=False, rng=rng) in {'a', 'c'}
+    assert relations.sample(0) == []
+    with pytest.raises(IndexError):
+        relations.sample_neighbour('missing')
+    with pytest.raises(IndexError):
+        MultiMap().sample()
+
+
+# Weighted samples should follow frequencies while uniform ones should not.
+@pytest.mark.unit
+def test__multimap_sample02():
+    relations = MultiMap([(1, 'a')] * 9 + [(2, 'b')])
+    rng = random.Random(0)
+    weighted = Counter(relations.sample(10_000, rng=rng))
+    uniform = Counter(relations.sample(10_000, weighted=False, rng=rng))
+    assert 0.85 < weighted[1, 'a'] / 10_000 < 0.95
+    assert 0.45 < uniform[1, 'a'] / 10_000 < 0.55
+    assert 0.85 < Counter(relations.sample_source(rng=rng) for _ in range(10_000))[1] / 10_000 < 0.95
+
+
+# Samples should track modifications, copies & inverses.
+@pytest.mark.unit
+def test__multimap_sample03(data):
+    relations = MultiMap(data)
+    rng = random.Random(0)
+    relations.sample()
+    clone = relations.copy().add(9, 'z', count=1_000)
+    relations.remove(2, MultiMap.UNDEFINED).add(5, 'e', count=3)
+    assert set(relations.sample(200, weighted=False, rng=rng)) == set(relations.items())
+    assert Counter(clone.sample(100, rng=rng)).most_common(1)[0][0] == (9, 'z')
+    assert relations.sample_neighbour(5, rng=rng) == 'e'
+    relations.inverse(copy=False)
+    assert set(relations.sample(200, weighted=False, rng=rng)) == set(relations.items())
+    with pytest.raises(IndexError):
+        relations.clear().sample()
+
+
+# Profile drawing random relationships by materializing a large map.
+@pytest.mark.stress
+@pytest.mark.benchmark(group="multimap-sample")
+def test__multimap_sample04(benchmark, edges):
+    relations = MultiMap(edges)
+    rng = random.Random(0)
+    benchmark(lambda: rng.choices(list(relations), k=100))
+
+
+# Profile drawing random relationships of a large map.
+@pytest.mark.stress
+@pytest.mark.benchmark(group="multimap-sample")
+def test__multimap_sample05(benchmark, edges):
+    relations = MultiMap(edges)
+    rng = random.Random(0)
+    relations.sample()
+    benchmark(lambda: relations.add(0, 0).remove(0, 0).sample(100, rng=rng))
+
+
+# Sources matching all, any or some targets should be found.
+@pytest.mark.unit
+def test__multimap_matching01(data):
+    relations = MultiMap(data)
+    assert relations.sources_with_all(['a', 'c']) == {2}
+    assert relations.sources_with_all(['c', 'd']) == {3}
+    assert relations.sources_with_all(['a', 'z']) == set()
+    assert relations.sources_with_all([]) == set(relations.domain)
+    assert relations.sources_with_any(['a', 'd']) == {1, 2, 3, None}
+    assert relations.sources_with_at_least(['a', 'b', 'c', 'd'], 2) == {2, 3}
+    assert relations.sources_with_at_least(['a', 'b', 'c', 'd'], 3) == {3}
+    assert relations.sources_with_at_least(['a', 'a', 'c'], 2) == {2}
+    assert relations.sources_with_at_least(['a'], 2) == set()
+    assert relations.targets_with_all([2, 3]) == {'c'}
+    assert relations.targets_with_any([1, 4]) == {'a', None}
+    assert relations.targets_with_at_least([1, 2, 3], 2) == {'a', 'c'}
+    assert relations.inverse(view=True).sources_with_all([2, 3]) == {'c'}
+    assert relations.inverse(view=True).targets_with_at_least(['a', 'c'], 2) == {2}
+
+
+# Matching queries should agree with intersecting lookups of random maps.
+@pytest.mark.unit
+def test__multimap_matching02(edges):
+    relations = MultiMap(edges[:5_000])
+    rng = random.Random(0)
+    for _ in range(50):
+        dsts = rng.sample(range(100), rng.randrange(1, 5))
+        related = [set(relations.target(dst)) for dst in dsts]
+        k = rng.randrange(1, len(dsts) + 1)
+        assert relations.sources_with_all(dsts) == set.intersection(*related)
+        assert relations.sources_with_any(dsts) == set.union(*related)
+        assert relations.sources_with_at_least(dsts, k) == {
+            src for src in set.union(*related)
+            if sum(src in nodes for nodes in related) >= k
+        }
+
+
+# Profile finding targets related to a rare & a hub source by intersecting lookups.
+@pytest.mark.stress
+@pytest.mark.benchmark(group="multimap-matching")
+def test__multimap_matching03(benchmark, edges):
+    relations = MultiMap(edges)
+    hub, rare = relations.hubs(1)[0][0], min(relations.domain, key=relations.out_degree)
+    benchmark(lambda: set.intersection(*(set(relations.source(src)) for src in (hub, rare))))
+
+
+# Profile finding targets related to a rare & a hub source smallest first.
+@pytest.mark.stress
+@pytest.mark.benchmark(group="multimap-matching")
+def test__multimap_matching04(benchmark, edges):
+    relations = MultiMap(edges)
+    hub, rare = relations.hubs(1)[0][0], min(relations.domain, key=relations.out_degree)
+    benchmark(relations.targets_with_all, (hub, rare))
+
+
+# Profile retrieving the top hubs of a large map after a small edit.
+@pytest.mark.stress
+@pytest.mark.benchmark(group="multimap-hubs")
+def test__multimap_hubs00(benchmark, edges):
+    relations = MultiMap(edges)
+    relations.hubs()
+    benchmark(lambda: relations.add(0, 0).remove(0, 0).hubs(10))
+    assert relations.hubs(1)[0][1] == max(map(len, map(relations.source, relations.domain)))
+
+
 # Sample test data with duplicate, many-to-many, mixed types & None values allowed.
 @pytest.fixture
 def data() -> Iterable[Relation]:
@@ -298,3 +1187,13 @@ def random_item() -> Tuple[int, str]:
     src = random.randrange(0, 100)
     dst = ''.join(random.choices(string.ascii_lowercase))
     return src, dst
+
+
+# Generates a large random graph with hub nodes & duplicate relationships.
+@pytest.fixture(scope="module")
+def edges() -> List[Relation]:
+    rnd = random.Random(0)
+    return [
+        (int(rnd.paretovariate(1)) % 1_000, rnd.randrange(0, 5_000))
+        for _ in range(50_000)
+    ]
@@ -0,0 +1,102 @@
+#!usr/bin/env python
+
+from pyutils.multimapbuilder import *
+import pytest
+import random
+
+
+# Building from files should yield all relationships regardless of chunking.
+@pytest.mark.unit
+@pytest.mark.parametrize("workers, chunk_size", [(1, 1 << 20), (1, 7), (3, 5), (2, 1)])
+def test__multimapbuilder_build01(data, tmp_path, workers, chunk_size):
+    path = tmp_path / "relations.tsv"
+    path.write_text(''.join(f"{src}\t{dst}\n" for src, dst in data))
+    relations = MultiMapBuilder(workers=workers, chunk_size=chunk_size).build(str(path))
+    assert relations == MultiMap(data)
+    assert len(relations) == len(data)
+
+
+# Building should accept grouped frequencies, other delimiters & blank lines.
+@pytest.mark.unit
+def test__multimapbuilder_build02(tmp_path):
+    path = tmp_path / "relations.csv"
+    path.write_text("a,x,3\na,x\n\nb,y\r\nb,y,2")
+    relations = MultiMapBuilder(workers=1, delimiter=',', chunk_size=4).build(str(path))
+    assert relations == MultiMap([('a', 'x')] * 4 + [('b', 'y')] * 3)
+
+
+# Building should optionally save a snapshot.
+@pytest.mark.unit
+def test__multimapbuilder_build03(data, tmp_path):
+    path = tmp_path / "relations.tsv"
+    path.write_text(''.join(f"{src}\t{dst}\n" for src, dst in data))
+    relations = MultiMapBuilder(workers=1).build(str(path), snapshot=str(tmp_path / "relations.pymm"))
+    assert MultiMap.open(str(tmp_path / "relations.pymm")) == relations
+
+
+# Building from malformed or empty files.
+@pytest.mark.unit
+def test__multimapbuilder_build04(tmp_path):
+    path = tmp_path / "relations.tsv"
+    path.write_text("")
+    assert MultiMapBuilder(workers=2).build(str(path)) == MultiMap()
+    path.write_text("a\tb\tc\td\n")
+    with pytest.raises(ValueError):
+        MultiMapBuilder(workers=1).build(str(path))
+    with pytest.raises(ValueError):
+        MultiMapBuilder(chunk_size=0)
+
+
+# Building should only split lines on line feeds regardless of other unicode line breaks.
+@pytest.mark.unit
+@pytest.mark.parametrize("workers", [1, 2])
+def test__multimapbuilder_build06(tmp_path, workers):
+    path = tmp_path / "relations.tsv"
+    path.write_bytes("café\u2028bar\tx\r\na\x0cb\tz\u0085\na\x0cb\tz\u0085\n".encode())
+    relations = MultiMapBuilder(workers=workers, chunk_size=8).build(str(path))
+    assert relations == MultiMap([("café\u2028bar", 'x')] + [("a\x0cb", "z\u0085")] * 2)
+
+
+# Built maps should cancel non positive frequencies & index both directions consistently.
+@pytest.mark.unit
+@pytest.mark.parametrize("workers", [1, 3])
+def test__multimapbuilder_build07(tmp_path, workers):
+    path = tmp_path / "relations.tsv"
+    path.write_text("a\tx\t2\nb\ty\t0\nc\tx\na\tx\t-2\nc\ty\t3\n")
+    relations = MultiMapBuilder(workers=workers, chunk_size=6).build(str(path))
+    expected = MultiMap([('c', 'x')] + [('c', 'y')] * 3)
+    assert relations == expected and relations.inverse() == expected.inverse()
+    assert relations.inverse(view=True) == expected.inverse()
+    assert relations.out_degree('c') == 4 and relations.in_degree('y') == 3 and relations.in_degree('a') == 0
+    assert relations.fingerprint() == expected.fingerprint()
+
+
+# Profile building from a large file with varying number of processes.
+@pytest.mark.stress
+@pytest.mark.benchmark(group="multimap-build")
+@pytest.mark.parametrize("workers", [1, 2, 4])
+def test__multimapbuilder_build05(benchmark, edge_file, workers):
+    builder = MultiMapBuilder(workers=workers, chunk_size=1 << 18)
+    relations = benchmark.pedantic(builder.build, args=(edge_file,), rounds=3)
+    assert len(relations) == 200_000
+
+
+# Sample test data with duplicate, many-to-many relationships.
+@pytest.fixture
+def data() -> List[Tuple[str, str]]:
+    return [
+        ("1", "a"), ("2", "a"), ("2", "c"), ("2", "c"), ("3", "b"), ("3", "c"), ("3", "d"),
+        ("None", 'd'), ("4", "None")
+    ]
+
+
+# Generates a large random file of relationships.
+@pytest.fixture(scope="module")
+def edge_file(tmp_path_factory) -> str:
+    rnd = random.Random(0)
+    path = tmp_path_factory.mktemp("edges") / "edges.tsv"
+    path.write_text(''.join(
+        f"{int(rnd.paretovariate(1)) % 1_000}\t{rnd.randrange(0, 5_000)}\n"
+        for _ in range(200_000)
+    ))
+    return str(path)
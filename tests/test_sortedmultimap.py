@@ -0,0 +1,130 @@
+#!usr/bin/env python
+
+from pyutils.sortedmultimap import *
+from typing import Iterable, List
+import pickle
+import pytest
+import random
+
+
+# Sorted maps should behave like regular maps.
+@pytest.mark.unit
+def test__sortedmultimap_equality01(data):
+    relations = SortedMultiMap(data)
+    assert relations == MultiMap(data) and MultiMap(data) == relations
+    assert relations == SortedMultiMap(reversed(data))
+    assert pickle.loads(pickle.dumps(relations)) == relations
+    assert relations.copy() == relations
+
+
+# Iteration should be ordered by source nodes.
+@pytest.mark.unit
+def test__sortedmultimap_items01(data):
+    relations = SortedMultiMap(reversed(data))
+    assert [src for src, _ in relations] == [1, 2, 2, 2, 3, 3, 3, 4, 4]
+    assert list(relations.items(with_counts=True))[:3] == [(1, 'a', 1), (2, 'c', 2), (2, 'a', 1)]
+
+
+# Ranges should retrieve nodes within bounds in either order & direction.
+@pytest.mark.unit
+def test__sortedmultimap_irange01(data):
+    relations = SortedMultiMap(data)
+    assert list(relations.irange()) == [1, 2, 3, 4]
+    assert list(relations.irange(2, 3)) == [2, 3]
+    assert list(relations.irange(2, 4, inclusive=(False, False))) == [3]
+    assert list(relations.irange(hi=2, reverse=True)) == [2, 1]
+    assert list(relations.irange(5)) == [] and list(relations.irange(3, 2)) == []
+    assert list(relations.irange('b', direction="backward")) == ['b', 'c', 'd', 'e']
+    with pytest.raises(ValueError):
+        relations.irange(direction="sideways")
+
+
+# Prefixes should retrieve string nodes starting with them.
+@pytest.mark.unit
+def test__sortedmultimap_prefix01():
+    relations = SortedMultiMap([("apple", 1), ("apricot", 2), ("banana", 3), ("ap", 4), ("b", 5)])
+    assert list(relations.prefix("ap")) == ["ap", "apple", "apricot"]
+    assert list(relations.prefix("apr")) == ["apricot"]
+    assert list(relations.prefix("c")) == []
+    assert list(relations.prefix("")) == sorted(relations.domain)
+
+
+# Ordered indices should track modifications, copies & inverses.
+@pytest.mark.unit
+def test__sortedmultimap_modify01(data):
+    relations = SortedMultiMap(data)
+    clone = relations.copy().add(0, 'z')
+    relations.remove(1, 'a').remove(3, MultiMap.UNDEFINED)
+    assert list(relations.irange()) == [2, 4]
+    assert list(relations.irange(direction="backward")) == ['a', 'c', 'd', 'e']
+    assert list(clone.irange()) == [0, 1, 2, 3, 4]
+    relations.inverse(copy=False)
+    assert list(relations.irange()) == ['a', 'c', 'd', 'e']
+    assert list(relations.clear().irange()) == []
+
+
+# Incomparable nodes should be rejected without modifying the map.
+@pytest.mark.unit
+def test__sortedmultimap_modify02():
+    relations = SortedMultiMap([(1, 'a')])
+    with pytest.raises(TypeError):
+        relations.add('x', 'b')
+    with pytest.raises(TypeError):
+        relations.add(2, 3)
+    assert len(relations) == 1 and list(relations) == [(1, 'a')]
+    assert list(relations.irange()) == [1] and list(relations.irange(direction="backward")) == ['a']
+    assert relations == SortedMultiMap([(1, 'a')])
+    relations.add(2, 'b')
+    assert list(relations) == [(1, 'a'), (2, 'b')]
+
+
+# Randomly churned maps should keep their nodes sorted across many chunks.
+@pytest.mark.unit
+def test__sortedmultimap_churn01():
+    rnd = random.Random(0)
+    relations = SortedMultiMap()
+    for _ in range(20_000):
+        src, dst = rnd.randrange(3_000), rnd.randrange(50)
+        if rnd.random() < 0.7:
+            relations.add(src, dst)
+        else:
+            relations.remove(src, MultiMap.UNDEFINED)
+    assert list(relations.irange()) == sorted(relations.domain)
+    assert list(relations.irange(direction="backward")) == sorted(relations.range)
+    assert list(relations.irange(1_000, 2_000, reverse=True)) == \
+        sorted((src for src in relations.domain if 1_000 <= src <= 2_000), reverse=True)
+
+
+# Profile scanning a range of source nodes of a large map.
+@pytest.mark.stress
+@pytest.mark.benchmark(group="sortedmultimap-irange")
+def test__sortedmultimap_irange00(benchmark, edges):
+    relations = MultiMap(edges)
+    benchmark(lambda: [src for src in relations.domain if 100 <= src < 110])
+
+
+# Profile scanning a range of source nodes of a large sorted map.
+@pytest.mark.stress
+@pytest.mark.benchmark(group="sortedmultimap-irange")
+def test__sortedmultimap_irange01(benchmark, edges):
+    relations = SortedMultiMap(edges)
+    benchmark(lambda: list(relations.irange(100, 110, inclusive=(True, False))))
+
+
+# Sample test data with duplicate, many-to-many & mixed types values allowed.
+@pytest.fixture
+def data() -> Iterable[Relation]:
+    return [
+        (1, "a"), (2, "a"), (2, "c"), (2, "c"), (3, "b"), (3, "c"), (3, "d"),
+        (4, 'd'), (4, "e")
+    ]
+
+
+# Generates a large random graph with hub nodes & duplicate relationships.
+@pytest.fixture(scope="module")
+def edges() -> List[Relation]:
+    rnd = random.Random(0)
+    return [
+        (int(rnd.paretovariate(1)) % 1_000, rnd.randrange(0, 5_000))
+        for _ in range(50_000)
+    ]
@@ -2,6 +2,7 @@
 
 from pyutils.span import *
 import pytest
+import random
 
 
 @pytest.mark.unit
@@ -55,3 +56,76 @@ def test__span07():
 def test__span08():
     assert Span(0, 5).contains(Span(2, 3))
     assert not Span(0, 5).contains(Span(2, 6))
+
+
+@pytest.mark.unit
+def test__spanindex00():
+    index = SpanIndex([Span(0, 5), Span(3, 9), Span(6, 8), Span(None, 1), Span(7, None), Span(0, 5)])
+    assert len(index) == 5 and Span(3, 9) in index
+    assert list(index) == [Span(None, 1), Span(0, 5), Span(3, 9), Span(6, 8), Span(7, None)]
+
+
+@pytest.mark.unit
+def test__spanindex01():
+    index = SpanIndex([Span(0, 5), Span(3, 9), Span(6, 8), Span(None, 1), Span(7, None)])
+    assert index.overlapping(Span(4, 6)) == [Span(0, 5), Span(3, 9), Span(6, 8)]
+    assert index.overlapping(Span(10, None)) == [Span(7, None)]
+    assert index.overlapping(Span()) == list(index)
+    assert index.containing(1) == [Span(None, 1), Span(0, 5)]
+    assert index.containing(-100) == [Span(None, 1)]
+    assert index.within(Span(0, 9)) == [Span(0, 5), Span(3, 9), Span(6, 8)]
+    assert index.within(Span(None, 5)) == [Span(None, 1), Span(0, 5)]
+
+
+@pytest.mark.unit
+def test__spanindex02():
+    index = SpanIndex().add(Span(0, 5)).add(Span(2, 3)).add(Span(2, 3))
+    assert index.containing(4) == [Span(0, 5)] and len(index) == 2
+    index.discard(Span(0, 5)).discard(Span(0, 5))
+    assert index.containing(4) == [] and index.containing(2) == [Span(2, 3)]
+    with pytest.raises(KeyError):
+        index.remove(Span(0, 5))
+
+
+@pytest.mark.unit
+def test__spanindex03():
+    rnd = random.Random(0)
+    spans = set()
+    index = SpanIndex()
+    for _ in range(2_000):
+        start = rnd.randrange(1_000)
+        span = Span(start, start + rnd.randrange(50))
+        if rnd.random() < 0.7:
+            spans.add(span)
+            index.add(span)
+        else:
+            spans.discard(span)
+            index.discard(span)
+    query = Span(400, 600)
+    assert set(index.overlapping(query)) == {span for span in spans if span.end >= 400 and span.start <= 600}
+    assert set(index.within(query)) == {span for span in spans if span.within(query)}
+    assert set(index.containing(500)) == {span for span in spans if span.start <= 500 <= span.end}
+    assert list(SpanIndex(spans)) == list(index)
+
+
+@pytest.mark.stress
+@pytest.mark.benchmark(group="span-overlapping")
+def test__spanindex04(benchmark, spans):
+    query = Span(500_000, 501_000)
+    benchmark(lambda: [span for span in spans if span.overlaps(query) or span.within(query) or span.contains(query)])
+
+
+@pytest.mark.stress
+@pytest.mark.benchmark(group="span-overlapping")
+def test__spanindex05(benchmark, spans):
+    index = SpanIndex(spans)
+    benchmark(index.overlapping, Span(500_000, 501_000))
+
+
+@pytest.fixture(scope="module")
+def spans():
+    rnd = random.Random(0)
+    return [
+        Span(start, start + rnd.randrange(1_000))
+        for start in (rnd.randrange(1_000_000) for _ in range(100_000))
+    ]